@@ -1,46 +1,130 @@
 import os
 import json
+import atexit
 import logging
-from datetime import datetime
-from typing import Dict, Any, List, Optional
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 
-from flask import Flask, render_template, request, jsonify, send_file, Response, url_for
+import orjson
+from flask import Flask, render_template, request, jsonify, send_file, Response, url_for, g
+from flask.json.provider import DefaultJSONProvider
+from flask_compress import Compress
 from flask_cors import CORS
+from werkzeug.exceptions import HTTPException
 from werkzeug.utils import secure_filename
 
 from config import Config
-from youtube_dl_helper import AudioExtractor
+from youtube_dl_helper import AudioExtractor, now_iso
 from playlist_manager import Playlist, Track
 from audio_processor import AudioProcessor
+from cache_index import CacheIndex
 
 # Configurar logging
 # Ensure logs and data directories exist
 for dir_path in ['logs', 'data', 'audio_cache']:
     Path(dir_path).mkdir(parents=True, exist_ok=True)
 
+class CachedTimeFormatter(logging.Formatter):
+    """Formatter que reutiliza la fecha formateada dentro del mismo segundo"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cached_key = None
+        self._cached_time = ''
+    
+    def formatTime(self, record, datefmt=None):
+        key = (int(record.created), datefmt)
+        if key != self._cached_key:
+            ct = self.converter(record.created)
+            self._cached_time = time.strftime(datefmt or self.default_time_format, ct)
+            self._cached_key = key
+        if datefmt:
+            return self._cached_time
+        return self.default_msec_format % (self._cached_time, record.msecs)
+
+# Los handlers de las peticiones solo encolan el registro; un hilo aparte
+# escribe en archivo y consola
+log_formatter = CachedTimeFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+file_handler = RotatingFileHandler('logs/app.log', maxBytes=10 * 1024 * 1024, backupCount=5)
+file_handler.setFormatter(log_formatter)
+stream_handler = logging.StreamHandler()
+stream_handler.setFormatter(log_formatter)
+
+log_queue = queue.Queue(-1)
+# Solo el mensaje: el formato completo lo aplican los handlers del listener
+queue_handler = QueueHandler(log_queue)
+queue_handler.setFormatter(logging.Formatter('%(message)s'))
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/app.log'),
-        logging.StreamHandler()
-    ]
+    handlers=[queue_handler]
 )
+log_listener = QueueListener(log_queue, file_handler, stream_handler)
+log_listener.start()
+atexit.register(log_listener.stop)
+
 logger = logging.getLogger(__name__)
 
+# Importar después de configurar logging para no perder sus mensajes de arranque
+from tasks import (
+    celery, convert_audio_task, normalize_audio_task,
+    merge_audio_task, process_pipeline_task
+)
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Serialización JSON de Flask (jsonify, get_json) usando orjson"""
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+    
+    def loads(self, s, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
 # Inicializar Flask app
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 Config.init_app(app)
 
-# Habilitar CORS
-CORS(app)
+# Habilitar CORS (el preflight del audio se cachea en el navegador un día)
+CORS(app, resources={
+    r'/api/audio/*': {'methods': ['GET', 'HEAD', 'OPTIONS'], 'max_age': 86400},
+    r'/*': {}
+})
+
+# Compresión de respuestas JSON (ver COMPRESS_* en Config)
+Compress(app)
 
 # Inicializar componentes
-audio_extractor = AudioExtractor()
+cache_index = CacheIndex()
+audio_extractor = AudioExtractor(cache_index)
 playlist = Playlist()
 audio_processor = AudioProcessor()
 
+# Descargas en segundo plano, una sola por track aunque haya varias peticiones
+download_executor = ThreadPoolExecutor(
+    max_workers=Config.DOWNLOAD_WORKERS,
+    thread_name_prefix='download'
+)
+pending_downloads: Dict[str, Future] = {}
+pending_downloads_lock = threading.Lock()
+
+# Extracción de información en lote (AudioExtractor cachea y agrupa por URL)
+info_executor = ThreadPoolExecutor(
+    max_workers=Config.INFO_WORKERS,
+    thread_name_prefix='info'
+)
+
+# Guardar cambios diferidos de la playlist antes de terminar el proceso
+atexit.register(playlist.flush)
+
 @app.route('/')
 def index():
     """Página principal del reproductor"""
@@ -49,479 +133,525 @@ def index():
 @app.route('/api/playlist', methods=['GET'])
 def get_playlist():
     """Obtener lista de reproducción completa"""
-    try:
-        tracks = [track.to_dict() for track in playlist.tracks]
-        stats = playlist.get_stats()
-        
-        return jsonify({
-            'success': True,
-            'tracks': tracks,
-            'stats': stats,
-            'current_track': playlist.get_current_track().to_dict() if playlist.get_current_track() else None
-        })
-    except Exception as e:
-        logger.error(f"Error obteniendo playlist: {e}")
-        return jsonify({'success': False, 'error': str(e)}), 500
+    tracks = [track.to_dict() for track in playlist.tracks]
+    stats = playlist.get_stats()
+    
+    return jsonify({
+        'success': True,
+        'tracks': tracks,
+        'stats': stats,
+        'current_track': playlist.get_current_track().to_dict() if playlist.get_current_track() else None
+    })
 
 @app.route('/api/playlist/add', methods=['POST'])
 def add_to_playlist():
     """Agregar URL a la playlist"""
-    try:
-        data = request.get_json()
-        
-        if not data or 'url' not in data:
-            return jsonify({'success': False, 'error': 'URL requerida'}), 400
-        
-        url = data['url'].strip()
-        position = data.get('position')
-        
-        # Extraer información del audio
-        info = audio_extractor.extract_info(url)
-        
-        if 'error' in info:
-            return jsonify({'success': False, 'error': info['error']}), 400
-        
-        # Si es playlist, agregar todas las entradas
-        if info.get('type') == 'playlist':
-            tracks_added = []
+    data = request.get_json()
+    
+    if not data or 'url' not in data:
+        return jsonify({'success': False, 'error': 'URL requerida'}), 400
+    
+    url = data['url'].strip()
+    position = data.get('position')
+    
+    # Extraer información del audio
+    info = audio_extractor.extract_info(url)
+    
+    if 'error' in info:
+        return jsonify({'success': False, 'error': info['error']}), 400
+    
+    # Si es playlist, agregar todas las entradas
+    if info.get('type') == 'playlist':
+        tracks_added = []
+        # Un solo guardado para toda la playlist importada
+        with playlist.batch():
             for entry in info.get('entries', []):
                 track = playlist.add_track(entry, position)
                 if position is not None:
                     position += 1
                 tracks_added.append(track.to_dict())
-            
-            return jsonify({
-                'success': True,
-                'message': f'Playlist agregada: {len(tracks_added)} pistas',
-                'tracks': tracks_added,
-                'playlist_info': {
-                    'title': info.get('title'),
-                    'count': info.get('count')
-                }
-            })
-        
-        # Si es un solo track
-        track = playlist.add_track(info, position)
         
         return jsonify({
             'success': True,
-            'message': 'Pista agregada exitosamente',
-            'track': track.to_dict()
+            'message': f'Playlist agregada: {len(tracks_added)} pistas',
+            'tracks': tracks_added,
+            'playlist_info': {
+                'title': info.get('title'),
+                'count': info.get('count')
+            }
         })
-        
-    except Exception as e:
-        logger.error(f"Error agregando a playlist: {e}")
-        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    # Si es un solo track
+    track = playlist.add_track(info, position)
+    
+    return jsonify({
+        'success': True,
+        'message': 'Pista agregada exitosamente',
+        'track': track.to_dict()
+    })
 
 @app.route('/api/playlist/remove/<track_id>', methods=['DELETE'])
 def remove_from_playlist(track_id):
     """Remover pista de la playlist"""
-    try:
-        success = playlist.remove_track(track_id)
-        
-        if success:
-            return jsonify({
-                'success': True,
-                'message': 'Pista removida exitosamente'
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'error': 'Pista no encontrada'
-            }), 404
-            
-    except Exception as e:
-        logger.error(f"Error removiendo de playlist: {e}")
-        return jsonify({'success': False, 'error': str(e)}), 500
+    success = playlist.remove_track(track_id)
+    
+    if success:
+        return jsonify({
+            'success': True,
+            'message': 'Pista removida exitosamente'
+        })
+    else:
+        return jsonify({
+            'success': False,
+            'error': 'Pista no encontrada'
+        }), 404
 
 @app.route('/api/playlist/move', methods=['POST'])
 def move_track():
     """Mover pista en la playlist"""
-    try:
-        data = request.get_json()
-        
-        if not data or 'track_id' not in data or 'position' not in data:
-            return jsonify({'success': False, 'error': 'Datos incompletos'}), 400
-        
-        success = playlist.move_track(data['track_id'], data['position'])
-        
-        if success:
-            return jsonify({
-                'success': True,
-                'message': 'Pista movida exitosamente'
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'error': 'Error moviendo pista'
-            }), 400
-            
-    except Exception as e:
-        logger.error(f"Error moviendo pista: {e}")
-        return jsonify({'success': False, 'error': str(e)}), 500
+    data = request.get_json()
+    
+    if not data or 'track_id' not in data or 'position' not in data:
+        return jsonify({'success': False, 'error': 'Datos incompletos'}), 400
+    
+    success = playlist.move_track(data['track_id'], data['position'])
+    
+    if success:
+        return jsonify({
+            'success': True,
+            'message': 'Pista movida exitosamente'
+        })
+    else:
+        return jsonify({
+            'success': False,
+            'error': 'Error moviendo pista'
+        }), 400
 
 @app.route('/api/playlist/clear', methods=['DELETE'])
 def clear_playlist():
     """Limpiar playlist completa"""
-    try:
-        playlist.clear()
-        return jsonify({
-            'success': True,
-            'message': 'Playlist limpiada exitosamente'
-        })
-    except Exception as e:
-        logger.error(f"Error limpiando playlist: {e}")
-        return jsonify({'success': False, 'error': str(e)}), 500
+    playlist.clear()
+    return jsonify({
+        'success': True,
+        'message': 'Playlist limpiada exitosamente'
+    })
 
 @app.route('/api/playlist/shuffle', methods=['POST'])
 def shuffle_playlist():
     """Mezclar playlist"""
-    try:
-        playlist.shuffle()
-        return jsonify({
-            'success': True,
-            'message': 'Playlist mezclada exitosamente'
-        })
-    except Exception as e:
-        logger.error(f"Error mezclando playlist: {e}")
-        return jsonify({'success': False, 'error': str(e)}), 500
+    playlist.shuffle()
+    return jsonify({
+        'success': True,
+        'message': 'Playlist mezclada exitosamente'
+    })
 
 @app.route('/api/playlist/current', methods=['GET', 'POST'])
 def current_track():
     """Obtener o establecer track actual"""
-    try:
-        if request.method == 'GET':
-            track = playlist.get_current_track()
-            if track:
-                return jsonify({
-                    'success': True,
-                    'track': track.to_dict()
-                })
-            else:
-                return jsonify({
-                    'success': True,
-                    'track': None,
-                    'message': 'No hay track actual'
-                })
-        
-        elif request.method == 'POST':
-            data = request.get_json()
-            
-            if not data or 'track_id' not in data:
-                return jsonify({'success': False, 'error': 'track_id requerido'}), 400
-            
-            success = playlist.set_current_track(data['track_id'])
-            
-            if success:
-                track = playlist.get_current_track()
-                return jsonify({
-                    'success': True,
-                    'message': 'Track actual establecido',
-                    'track': track.to_dict()
-                })
-            else:
-                return jsonify({
-                    'success': False,
-                    'error': 'Track no encontrado'
-                }), 404
-                
-    except Exception as e:
-        logger.error(f"Error con track actual: {e}")
-        return jsonify({'success': False, 'error': str(e)}), 500
-
-@app.route('/api/playlist/next', methods=['POST'])
-def next_track():
-    """Obtener siguiente track"""
-    try:
-        track = playlist.next_track()
-        
+    if request.method == 'GET':
+        track = playlist.get_current_track()
         if track:
             return jsonify({
                 'success': True,
-                'track': track.to_dict(),
-                'message': 'Siguiente track'
+                'track': track.to_dict()
             })
         else:
             return jsonify({
                 'success': True,
                 'track': None,
-                'message': 'Fin de la playlist'
+                'message': 'No hay track actual'
             })
-    except Exception as e:
-        logger.error(f"Error obteniendo siguiente track: {e}")
-        return jsonify({'success': False, 'error': str(e)}), 500
-
-@app.route('/api/playlist/previous', methods=['POST'])
-def previous_track():
-    """Obtener track anterior"""
-    try:
-        track = playlist.previous_track()
+    
+    elif request.method == 'POST':
+        data = request.get_json()
         
-        if track:
+        if not data or 'track_id' not in data:
+            return jsonify({'success': False, 'error': 'track_id requerido'}), 400
+        
+        success = playlist.set_current_track(data['track_id'])
+        
+        if success:
+            _prefetch_upcoming()
+            track = playlist.get_current_track()
             return jsonify({
                 'success': True,
-                'track': track.to_dict(),
-                'message': 'Track anterior'
+                'message': 'Track actual establecido',
+                'track': track.to_dict()
             })
         else:
             return jsonify({
-                'success': True,
-                'track': None,
-                'message': 'Inicio de la playlist'
-            })
-    except Exception as e:
-        logger.error(f"Error obteniendo track anterior: {e}")
-        return jsonify({'success': False, 'error': str(e)}), 500
+                'success': False,
+                'error': 'Track no encontrado'
+            }), 404
 
-@app.route('/api/audio/stream/<track_id>', methods=['GET'])
+@app.route('/api/playlist/next', methods=['POST'])
+def next_track():
+    """Obtener siguiente track"""
+    track = playlist.next_track()
+    
+    if track:
+        _prefetch_upcoming()
+        return jsonify({
+            'success': True,
+            'track': track.to_dict(),
+            'message': 'Siguiente track'
+        })
+    else:
+        return jsonify({
+            'success': True,
+            'track': None,
+            'message': 'Fin de la playlist'
+        })
+
+@app.route('/api/playlist/previous', methods=['POST'])
+def previous_track():
+    """Obtener track anterior"""
+    track = playlist.previous_track()
+    
+    if track:
+        _prefetch_upcoming()
+        return jsonify({
+            'success': True,
+            'track': track.to_dict(),
+            'message': 'Track anterior'
+        })
+    else:
+        return jsonify({
+            'success': True,
+            'track': None,
+            'message': 'Inicio de la playlist'
+        })
+
+@app.route('/api/audio/stream/<track_id>', methods=['GET', 'HEAD'])
 def stream_audio(track_id):
     """Stream de audio para el reproductor"""
-    try:
-        track = playlist.get_track(track_id)
-        
-        if not track:
-            return jsonify({'success': False, 'error': 'Track no encontrado'}), 404
-        
-        # Si no hay archivo descargado, descargarlo
-        if not track.filepath or not os.path.exists(track.filepath):
-            filepath, metadata = audio_extractor.download_audio(track.url)
-            
-            if not filepath:
-                return jsonify({'success': False, 'error': 'Error descargando audio'}), 500
-            
-            # Actualizar track con información de descarga
-            track.filepath = filepath
-            track.metadata = metadata
-            playlist.save()
-        
-        # Verificar que el archivo existe
-        if not os.path.exists(track.filepath):
-            return jsonify({'success': False, 'error': 'Archivo no encontrado'}), 404
-        
-        # Stream del archivo
-        file_size = os.path.getsize(track.filepath)
-        range_header = request.headers.get('Range')
-        
-        if range_header:
-            # Soporte para HTTP Range requests (para streaming)
-            start, end = parse_range_header(range_header, file_size)
-            
-            with open(track.filepath, 'rb') as f:
-                f.seek(start)
-                data = f.read(end - start + 1)
-            
-            response = Response(
-                data,
-                206,  # Partial Content
-                mimetype='audio/mpeg',
-                direct_passthrough=True
-            )
-            
-            response.headers.add('Content-Range', f'bytes {start}-{end}/{file_size}')
-            response.headers.add('Accept-Ranges', 'bytes')
-            response.headers.add('Content-Length', str(end - start + 1))
-            
-        else:
-            # Envío completo del archivo
-            response = send_file(
-                track.filepath,
-                mimetype='audio/mpeg',
-                as_attachment=False,
-                download_name=f"{track.title}.mp3"
-            )
-        
-        # Headers para streaming
-        response.headers.add('Cache-Control', 'no-cache')
-        response.headers.add('Content-Disposition', 'inline')
-        
+    track = _get_request_track(track_id)
+    
+    if not track:
+        return jsonify({'success': False, 'error': 'Track no encontrado'}), 404
+    
+    file_stat = _stat_file(track.filepath)
+    
+    # Sondeo HEAD: responder solo con los headers, sin abrir el archivo
+    if request.method == 'HEAD' and file_stat is not None:
+        response = Response(status=200, mimetype='audio/mpeg')
+        response.headers['Content-Length'] = str(file_stat.st_size)
+        response.headers['Accept-Ranges'] = 'bytes'
+        response.set_etag(_file_etag(file_stat))
+        response.last_modified = file_stat.st_mtime
+        response.cache_control.public = True
+        response.cache_control.max_age = 3600
+        response.cache_control.must_revalidate = True
         return response
+    
+    # Si no hay archivo descargado, descargarlo en segundo plano
+    if file_stat is None:
+        future = _submit_download(track)
+        
+        # Quien pide JSON (el reproductor sondea con HEAD) recibe 202 enseguida;
+        # los elementos <audio> esperan más, pero sin ocupar el hilo indefinidamente
+        wants_json = request.accept_mimetypes.best == 'application/json'
+        timeout = Config.STREAM_DOWNLOAD_WAIT if wants_json else Config.STREAM_MEDIA_WAIT
+        
+        try:
+            filepath = _finish_download(track, future, timeout=timeout)
+        except FutureTimeoutError:
+            # La descarga sigue en curso, el cliente debe volver a consultar
+            return jsonify({
+                'success': True,
+                'status': 'downloading',
+                'poll': url_for('stream_audio', track_id=track_id)
+            }), 202 if wants_json else 503, {'Retry-After': '2'}
+        
+        if not filepath:
+            return jsonify({'success': False, 'error': 'Error descargando audio'}), 500
         
-    except Exception as e:
-        logger.error(f"Error en stream de audio: {e}")
-        return jsonify({'success': False, 'error': str(e)}), 500
+        file_stat = _stat_file(track.filepath)
+    
+    # Verificar que el archivo existe
+    if file_stat is None:
+        return jsonify({'success': False, 'error': 'Archivo no encontrado'}), 404
+    
+    # Werkzeug se encarga de Range/If-Range, ETag y 304, y entrega el archivo
+    # mediante wsgi.file_wrapper (sendfile) cuando el servidor lo soporta
+    response = send_file(
+        track.filepath,
+        mimetype='audio/mpeg',
+        as_attachment=False,
+        download_name=f"{track.title}.mp3",
+        conditional=True,
+        etag=_file_etag(file_stat),
+        last_modified=file_stat.st_mtime,
+        max_age=3600
+    )
+    response.cache_control.must_revalidate = True
+    return response
 
 @app.route('/api/audio/download/<track_id>', methods=['GET'])
 def download_audio(track_id):
     """Descargar archivo de audio"""
-    try:
-        track = playlist.get_track(track_id)
-        
-        if not track:
-            return jsonify({'success': False, 'error': 'Track no encontrado'}), 404
-        
-        # Asegurar que el archivo existe
-        if not track.filepath or not os.path.exists(track.filepath):
-            filepath, metadata = audio_extractor.download_audio(track.url)
-            
-            if not filepath:
-                return jsonify({'success': False, 'error': 'Error descargando audio'}), 500
-            
-            track.filepath = filepath
-            playlist.save()
-        
-        return send_file(
-            track.filepath,
-            as_attachment=True,
-            download_name=f"{track.title}.mp3"
-        )
+    track = _get_request_track(track_id)
+    
+    if not track:
+        return jsonify({'success': False, 'error': 'Track no encontrado'}), 404
+    
+    # Asegurar que el archivo existe
+    if not track.filepath or not os.path.exists(track.filepath):
+        filepath = _finish_download(track, _submit_download(track))
         
-    except Exception as e:
-        logger.error(f"Error descargando audio: {e}")
-        return jsonify({'success': False, 'error': str(e)}), 500
+        if not filepath:
+            return jsonify({'success': False, 'error': 'Error descargando audio'}), 500
+    
+    return send_file(
+        track.filepath,
+        as_attachment=True,
+        download_name=f"{track.title}.mp3"
+    )
 
 @app.route('/api/audio/info', methods=['POST'])
 def get_audio_info():
     """Obtener información de audio sin agregar a playlist"""
-    try:
-        data = request.get_json()
-        
-        if not data or 'url' not in data:
-            return jsonify({'success': False, 'error': 'URL requerida'}), 400
-        
-        info = audio_extractor.extract_info(data['url'])
-        
-        if 'error' in info:
-            return jsonify({'success': False, 'error': info['error']}), 400
-        
+    data = request.get_json()
+    
+    if not data or 'url' not in data:
+        return jsonify({'success': False, 'error': 'URL requerida'}), 400
+    
+    info = audio_extractor.extract_info(data['url'])
+    
+    if 'error' in info:
+        return jsonify({'success': False, 'error': info['error']}), 400
+    
+    return jsonify({
+        'success': True,
+        'info': info
+    })
+
+@app.route('/api/audio/info/batch', methods=['POST'])
+def get_audio_info_batch():
+    """Obtener información de varias URLs en paralelo"""
+    data = request.get_json()
+    
+    if not data or not isinstance(data.get('urls'), list):
+        return jsonify({'success': False, 'error': 'Lista de URLs requerida'}), 400
+    
+    urls = data['urls']
+    
+    if len(urls) > Config.INFO_BATCH_MAX:
         return jsonify({
-            'success': True,
-            'info': info
-        })
-        
-    except Exception as e:
-        logger.error(f"Error obteniendo info de audio: {e}")
-        return jsonify({'success': False, 'error': str(e)}), 500
+            'success': False,
+            'error': f'Máximo {Config.INFO_BATCH_MAX} URLs por petición'
+        }), 400
+    
+    # map conserva el orden: results[i] corresponde siempre a urls[i]
+    results = list(info_executor.map(_extract_batch_item, urls))
+    
+    return jsonify({
+        'success': True,
+        'results': results
+    })
+
+def _extract_batch_item(url: Any) -> Dict[str, Any]:
+    """Información de una URL del lote; las entradas inválidas conservan su posición"""
+    if not isinstance(url, str) or not url.strip():
+        return {'error': 'URL inválida', 'status': 'error', 'url': url}
+    return audio_extractor.extract_info(url.strip())
+
+SETTINGS_FILE = os.path.join(Config.DATA_DIR, 'settings.json')
+
+DEFAULT_SETTINGS = {
+    'quality': '192',
+    'theme': 'dark',
+    'autoplay': True,
+    'notifications': True,
+    'cache_size': 1000,
+    'default_platform': 'youtube'
+}
+
+def _load_settings() -> Dict[str, Any]:
+    """Cargar configuraciones desde disco (o defaults)"""
+    if os.path.exists(SETTINGS_FILE):
+        try:
+            with open(SETTINGS_FILE, 'r') as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            # Si el archivo está corrupto o vacío, usar defaults
+            logger.warning(f"Archivo de configuración corrupto: {SETTINGS_FILE}. Usando defaults.")
+    
+    return dict(DEFAULT_SETTINGS)
+
+def _save_settings(settings: Dict[str, Any]):
+    """Guardar configuraciones con escritura atómica"""
+    temp_file = SETTINGS_FILE + '.tmp'
+    
+    with open(temp_file, 'w') as f:
+        json.dump(settings, f, indent=2)
+    
+    os.replace(temp_file, SETTINGS_FILE)
+
+# Configuraciones en memoria, se leen de disco una sola vez
+app_settings = _load_settings()
+app_settings_lock = threading.Lock()
 
 @app.route('/api/settings', methods=['GET', 'POST'])
 def settings():
     """Obtener o guardar configuraciones"""
-    settings_file = os.path.join(Config.DATA_DIR, 'settings.json')
-    
-    try:
-        if request.method == 'GET':
-            if os.path.exists(settings_file):
-                try:
-                    with open(settings_file, 'r') as f:
-                        settings = json.load(f)
-                except json.JSONDecodeError:
-                    # Si el archivo está corrupto o vacío, usar defaults
-                    logger.warning(f"Archivo de configuración corrupto: {settings_file}. Usando defaults.")
-                    settings = {
-                        'quality': '192',
-                        'theme': 'dark',
-                        'autoplay': True,
-                        'notifications': True,
-                        'cache_size': 1000,
-                        'default_platform': 'youtube'
-                    }
-            else:
-                settings = {
-                    'quality': '192',
-                    'theme': 'dark',
-                    'autoplay': True,
-                    'notifications': True,
-                    'cache_size': 1000,
-                    'default_platform': 'youtube'
-                }
-            
-            return jsonify({
-                'success': True,
-                'settings': settings
-            })
-        
-        elif request.method == 'POST':
-            data = request.get_json()
-            
-            if not data:
-                return jsonify({'success': False, 'error': 'Datos requeridos'}), 400
-            
-            # Cargar configuración existente
-            current_settings = {}
-            if os.path.exists(settings_file):
-                with open(settings_file, 'r') as f:
-                    current_settings = json.load(f)
-            
-            # Actualizar configuración
-            current_settings.update(data)
-            
-            # Guardar configuración
-            with open(settings_file, 'w') as f:
-                json.dump(current_settings, f, indent=2)
-            
-            # Actualizar configuración de calidad si es necesario
-            if 'quality' in data:
-                Config.DEFAULT_QUALITY = data['quality']
-            
-            return jsonify({
-                'success': True,
-                'message': 'Configuración guardada',
-                'settings': current_settings
-            })
-            
-    except Exception as e:
-        logger.error(f"Error en configuración: {e}")
-        return jsonify({'success': False, 'error': str(e)}), 500
-
-@app.route('/api/cache/clear', methods=['POST'])
-def clear_cache():
-    """Limpiar caché de audio"""
-    try:
-        data = request.get_json() or {}
-        platform = data.get('platform')
-        days_old = data.get('days_old', 7)
-        
-        deleted = audio_extractor.clear_cache(platform, days_old)
+    if request.method == 'GET':
+        with app_settings_lock:
+            current_settings = dict(app_settings)
         
         return jsonify({
             'success': True,
-            'message': f'{deleted} archivos eliminados del caché'
+            'settings': current_settings
         })
+    
+    elif request.method == 'POST':
+        data = request.get_json()
         
-    except Exception as e:
-        logger.error(f"Error limpiando caché: {e}")
-        return jsonify({'success': False, 'error': str(e)}), 500
-
-@app.route('/api/cache/info', methods=['GET'])
-def cache_info():
-    """Obtener información del caché"""
-    try:
-        cache_info = {
-            'total_size': 0,
-            'file_count': 0,
-            'by_platform': {}
-        }
+        if not data:
+            return jsonify({'success': False, 'error': 'Datos requeridos'}), 400
         
-        for root, dirs, files in os.walk(Config.ABS_CACHE_DIR):
-            for file in files:
-                if file.endswith(('.mp3', '.m4a', '.webm', '.opus', '.flac')):
-                    filepath = os.path.join(root, file)
-                    cache_info['total_size'] += os.path.getsize(filepath)
-                    cache_info['file_count'] += 1
-                    
-                    # Determinar plataforma por directorio
-                    rel_path = os.path.relpath(root, Config.ABS_CACHE_DIR)
-                    platform = rel_path.split(os.sep)[0] if os.sep in rel_path else 'other'
-                    
-                    if platform not in cache_info['by_platform']:
-                        cache_info['by_platform'][platform] = {
-                            'size': 0,
-                            'count': 0
-                        }
-                    
-                    cache_info['by_platform'][platform]['size'] += os.path.getsize(filepath)
-                    cache_info['by_platform'][platform]['count'] += 1
+        with app_settings_lock:
+            # Actualizar y guardar configuración
+            app_settings.update(data)
+            _save_settings(app_settings)
+            current_settings = dict(app_settings)
         
-        # Convertir tamaño a MB
-        cache_info['total_size_mb'] = cache_info['total_size'] / (1024 * 1024)
+        # Actualizar configuración de calidad si es necesario
+        if 'quality' in data:
+            Config.DEFAULT_QUALITY = data['quality']
         
         return jsonify({
             'success': True,
-            'cache_info': cache_info
+            'message': 'Configuración guardada',
+            'settings': current_settings
         })
-        
-    except Exception as e:
-        logger.error(f"Error obteniendo info de caché: {e}")
-        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/cache/clear', methods=['POST'])
+def clear_cache():
+    """Limpiar caché de audio"""
+    data = request.get_json() or {}
+    platform = data.get('platform')
+    days_old = data.get('days_old', 7)
+    
+    deleted = audio_extractor.clear_cache(platform, days_old)
+    
+    return jsonify({
+        'success': True,
+        'message': f'{deleted} archivos eliminados del caché'
+    })
+
+@app.route('/api/audio/convert/<track_id>', methods=['POST'])
+def convert_audio(track_id):
+    """Encolar conversión de formato del audio"""
+    data = request.get_json(silent=True) or {}
+    filepath, error = _get_track_file(track_id)
+    if error:
+        return error
+    
+    quality = Config.AUDIO_QUALITIES.get(str(data.get('quality', Config.DEFAULT_QUALITY)), {})
+    task = convert_audio_task.delay(
+        filepath,
+        output_format=data.get('format') or quality.get('format', 'mp3'),
+        bitrate=data.get('bitrate') or quality.get('bitrate') or '192k'
+    )
+    return _task_accepted(task)
+
+@app.route('/api/audio/normalize/<track_id>', methods=['POST'])
+def normalize_audio(track_id):
+    """Encolar normalización de volumen del audio"""
+    data = request.get_json(silent=True) or {}
+    filepath, error = _get_track_file(track_id)
+    if error:
+        return error
+    
+    task = normalize_audio_task.delay(filepath, float(data.get('target_lufs', -14.0)))
+    return _task_accepted(task)
+
+@app.route('/api/audio/process/<track_id>', methods=['POST'])
+def process_audio(track_id):
+    """Encolar varias operaciones (trim, loudnorm, convert) en una sola pasada"""
+    data = request.get_json(silent=True) or {}
+    
+    if not isinstance(data.get('ops'), list) or not data['ops']:
+        return jsonify({'success': False, 'error': 'Lista de operaciones requerida'}), 400
+    
+    filepath, error = _get_track_file(track_id)
+    if error:
+        return error
+    
+    task = process_pipeline_task.delay(filepath, data['ops'])
+    return _task_accepted(task)
+
+@app.route('/api/audio/merge', methods=['POST'])
+def merge_audio():
+    """Encolar la combinación de varias pistas en un solo archivo"""
+    data = request.get_json(silent=True) or {}
+    track_ids = data.get('track_ids')
+    
+    if not isinstance(track_ids, list) or len(track_ids) < 2:
+        return jsonify({'success': False, 'error': 'Se requieren al menos dos pistas'}), 400
+    
+    file_list = []
+    for track_id in track_ids:
+        filepath, error = _get_track_file(track_id)
+        if error:
+            return error
+        file_list.append(filepath)
+    
+    task = merge_audio_task.delay(file_list, data.get('format', 'mp3'))
+    return _task_accepted(task)
+
+@app.route('/api/tasks/<task_id>', methods=['GET'])
+def task_status(task_id):
+    """Consultar el estado de una tarea de procesamiento"""
+    result = celery.AsyncResult(task_id)
+    response = {
+        'success': True,
+        'task_id': task_id,
+        'status': result.state.lower()
+    }
+    
+    if result.successful():
+        if result.result:
+            response['download'] = url_for('task_result', task_id=task_id)
+        else:
+            response['success'] = False
+            response['error'] = 'Error procesando audio'
+    elif result.failed():
+        response['success'] = False
+        response['error'] = str(result.result)
+    
+    return jsonify(response)
+
+@app.route('/api/tasks/<task_id>/result', methods=['GET'])
+def task_result(task_id):
+    """Descargar el archivo generado por una tarea terminada"""
+    result = celery.AsyncResult(task_id)
+    
+    if not result.successful() or not result.result:
+        return jsonify({'success': False, 'error': 'Resultado no disponible'}), 404
+    
+    filepath = result.result
+    if not os.path.exists(filepath):
+        return jsonify({'success': False, 'error': 'Archivo no encontrado'}), 404
+    
+    return send_file(filepath, as_attachment=True, download_name=os.path.basename(filepath))
+
+@app.route('/api/cache/info', methods=['GET'])
+def cache_info():
+    """Obtener información del caché"""
+    return jsonify({
+        'success': True,
+        'cache_info': cache_index.snapshot()
+    })
+
+@app.route('/api/cache/reindex', methods=['POST'])
+def reindex_cache():
+    """Reconstruir el índice del caché recorriendo el disco"""
+    return jsonify({
+        'success': True,
+        'cache_info': cache_index.rebuild()
+    })
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -536,30 +666,94 @@ def health_check():
     
     return jsonify({
         'status': 'healthy',
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': now_iso(),
         'components': components
     })
 
-def parse_range_header(range_header: str, file_size: int):
-    """Parsear header Range HTTP"""
+def _get_request_track(track_id: str) -> Optional[Track]:
+    """Obtener track por ID, reutilizándolo durante el resto de la petición"""
+    track = g.get('track')
+    if track is None or track.id != track_id:
+        track = playlist.get_track(track_id)
+        g.track = track
+    return track
+
+def _submit_download(track: Track) -> Future:
+    """Encolar la descarga del track, reutilizando la que ya esté en curso"""
+    with pending_downloads_lock:
+        future = pending_downloads.get(track.id)
+        if future is None:
+            future = download_executor.submit(audio_extractor.download_audio, track.url)
+            pending_downloads[track.id] = future
+    return future
+
+def _finish_download(track: Track, future: Future, timeout: Optional[float] = None) -> Optional[str]:
+    """
+    Esperar la descarga y actualizar el track con el resultado
+    
+    Lanza concurrent.futures.TimeoutError si no termina dentro de timeout.
+    """
     try:
-        range_type, range_spec = range_header.split('=')
-        if range_type.strip() != 'bytes':
-            raise ValueError
-        
-        start_str, end_str = range_spec.split('-')
-        start = int(start_str) if start_str else 0
-        end = int(end_str) if end_str else file_size - 1
-        
-        # Validar rangos
-        if start < 0 or end >= file_size or start > end:
-            raise ValueError
-        
-        return start, end
-        
-    except:
-        # Si hay error, devolver archivo completo
-        return 0, file_size - 1
+        filepath, metadata = future.result(timeout=timeout)
+    finally:
+        # Liberar la entrada también si la descarga falló, para poder reintentarla
+        if future.done():
+            with pending_downloads_lock:
+                if pending_downloads.get(track.id) is future:
+                    del pending_downloads[track.id]
+    
+    if filepath:
+        # Actualizar track con información de descarga
+        track.filepath = filepath
+        track.metadata = metadata
+        playlist.save(defer=True)
+    
+    return filepath
+
+def _get_track_file(track_id: str) -> Tuple[Optional[str], Optional[Tuple[Response, int]]]:
+    """
+    Obtener la ruta del audio descargado de un track para procesarlo
+    
+    Devuelve (ruta, None) o (None, respuesta de error). Si aún no está
+    descargado, se encola la descarga para que el cliente reintente.
+    """
+    track = _get_request_track(track_id)
+    if not track:
+        return None, (jsonify({'success': False, 'error': 'Track no encontrado'}), 404)
+    
+    if not _stat_file(track.filepath):
+        _submit_download(track)
+        return None, (jsonify({'success': False, 'error': 'Audio aún no descargado, reintenta en unos segundos'}), 409)
+    
+    return track.filepath, None
+
+def _task_accepted(task) -> Tuple[Response, int]:
+    """Respuesta 202 con el id de la tarea encolada"""
+    return jsonify({
+        'success': True,
+        'task_id': task.id,
+        'status_url': url_for('task_status', task_id=task.id)
+    }), 202
+
+def _prefetch_upcoming():
+    """Descargar en segundo plano las próximas pistas mientras suena la actual"""
+    for track in playlist.upcoming_tracks(Config.PREFETCH_TRACKS):
+        if not _stat_file(track.filepath):
+            future = _submit_download(track)
+            future.add_done_callback(lambda f, track=track: _finish_download(track, f))
+
+def _stat_file(filepath: Optional[str]) -> Optional[os.stat_result]:
+    """Obtener stat del archivo con una sola llamada, None si no existe"""
+    if not filepath:
+        return None
+    try:
+        return os.stat(filepath)
+    except FileNotFoundError:
+        return None
+
+def _file_etag(file_stat: os.stat_result) -> str:
+    """ETag fuerte a partir del tamaño y la fecha de modificación"""
+    return f"{file_stat.st_size:x}-{file_stat.st_mtime_ns:x}"
 
 # Error handlers
 @app.errorhandler(404)
@@ -576,6 +770,14 @@ def internal_error(error):
 def too_large(error):
     return jsonify({'success': False, 'error': 'Archivo muy grande'}), 413
 
+@app.errorhandler(Exception)
+def unhandled_exception(error):
+    # Los errores HTTP sin handler propio (400, 405...) conservan su código
+    if isinstance(error, HTTPException):
+        return jsonify({'success': False, 'error': error.description}), error.code
+    logger.exception(f"Error en {request.method} {request.path}: {error}")
+    return jsonify({'success': False, 'error': str(error)}), 500
+
 if __name__ == '__main__':
     # Crear directorios necesarios
     os.makedirs('logs', exist_ok=True)
@@ -1,25 +1,64 @@
 import os
+import re
+import json
+import shutil
 import logging
 import tempfile
+import threading
 import subprocess
-from typing import Optional, Tuple, Dict, Any
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple, Dict, Any, List
 from pathlib import Path
 
 from config import Config
 
 logger = logging.getLogger(__name__)
 
+# Líneas finales de stderr de FFmpeg que se conservan para diagnóstico
+FFMPEG_STDERR_LINES = 200
+
+# Entradas de get_audio_info que se mantienen en memoria
+AUDIO_INFO_CACHE_SIZE = 1024
+
+# Códec de audio esperado para cada extensión de salida
+FORMAT_CODECS = {
+    'mp3': 'mp3',
+    'm4a': 'aac',
+    'aac': 'aac',
+    'flac': 'flac',
+    'ogg': 'vorbis',
+    'opus': 'opus',
+    'wav': 'pcm_s16le'
+}
+
+# Formatos sin pérdida (el bitrate no aplica)
+LOSSLESS_FORMATS = frozenset(('flac', 'wav'))
+
+# Bloque JSON que imprime el filtro loudnorm con print_format=json
+_LOUDNORM_JSON_RE = re.compile(r'\{[^{}]*"input_i"[^{}]*\}', re.S)
+
+def _safe_unlink(path: str):
+    """Borrar un archivo temporal, ignorando si ya no existe"""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
 class AudioProcessor:
     """Clase para procesamiento de archivos de audio"""
     
     def __init__(self):
         self.supported_formats = ['mp3', 'm4a', 'wav', 'flac', 'ogg', 'opus']
         self.ffmpeg_path = self._find_ffmpeg()
+        self.ffprobe_path = self._find_ffprobe()
+        # ruta -> (mtime_ns, tamaño, info); LRU para no relanzar ffprobe
+        self._info_cache: 'OrderedDict[str, Tuple[int, int, Dict[str, Any]]]' = OrderedDict()
+        self._info_cache_lock = threading.Lock()
     
     def _find_ffmpeg(self) -> Optional[str]:
         """Buscar ruta de FFmpeg"""
         # Verificar en PATH
-        import shutil
         ffmpeg_path = shutil.which('ffmpeg')
         if ffmpeg_path:
             return ffmpeg_path
@@ -39,6 +78,20 @@ class AudioProcessor:
         logger.warning("FFmpeg no encontrado. Algunas funcionalidades estarán limitadas.")
         return None
     
+    def _find_ffprobe(self) -> Optional[str]:
+        """Buscar ruta de FFprobe (normalmente junto a FFmpeg)"""
+        ffprobe_path = shutil.which('ffprobe')
+        if ffprobe_path:
+            return ffprobe_path
+        
+        if self.ffmpeg_path:
+            ffmpeg_dir, ffmpeg_name = os.path.split(self.ffmpeg_path)
+            candidate = os.path.join(ffmpeg_dir, ffmpeg_name.replace('ffmpeg', 'ffprobe'))
+            if os.path.exists(candidate):
+                return candidate
+        
+        return None
+    
     def convert_audio(
         self, 
         input_file: str, 
@@ -78,36 +131,18 @@ class AudioProcessor:
             output_file = tmp_file.name
         
         try:
-            # Construir comando FFmpeg
-            cmd = [
-                self.ffmpeg_path,
-                '-i', input_file,
-                '-vn',  # No video
-                '-ar', str(sample_rate),
-                '-ac', str(channels),
-                '-y'  # Sobrescribir sin preguntar
-            ]
-            
-            # Añadir parámetros según formato
-            if output_ext in ['mp3', 'aac', 'opus']:
-                cmd.extend(['-b:a', bitrate])
-            elif output_ext == 'flac':
-                cmd.append('-compression_level', '5')
-            
-            cmd.append(output_file)
+            copy = self._can_stream_copy(input_file, output_ext, bitrate, sample_rate, channels)
+            cmd = self._build_convert_cmd(
+                input_file, output_file, output_ext, bitrate, sample_rate, channels, copy
+            )
             
             # Ejecutar conversión
             logger.info(f"Ejecutando: {' '.join(cmd)}")
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 minutos timeout
-            )
+            result = self._run_ffmpeg(cmd, timeout=300)  # 5 minutos timeout
             
             if result.returncode != 0:
                 logger.error(f"Error en conversión: {result.stderr}")
-                os.unlink(output_file)
+                _safe_unlink(output_file)
                 return None
             
             # Verificar que el archivo existe y tiene tamaño
@@ -116,19 +151,183 @@ class AudioProcessor:
                 return output_file
             else:
                 logger.error("Archivo de salida vacío o no creado")
+                _safe_unlink(output_file)
                 return None
                 
         except subprocess.TimeoutExpired:
             logger.error("Timeout en conversión de audio")
-            if os.path.exists(output_file):
-                os.unlink(output_file)
+            _safe_unlink(output_file)
             return None
         except Exception as e:
             logger.error(f"Error en procesamiento de audio: {e}")
-            if os.path.exists(output_file):
-                os.unlink(output_file)
+            _safe_unlink(output_file)
             return None
     
+    def convert_audio_batch(
+        self,
+        jobs: List[Dict[str, Any]],
+        max_workers: Optional[int] = None
+    ) -> List[Optional[str]]:
+        """
+        Convertir varios archivos en paralelo
+        
+        Cada FFmpeg corre en su propio proceso, así que un pool de hilos basta
+        para repartir los archivos entre los núcleos disponibles.
+        
+        Args:
+            jobs: Lista de argumentos para convert_audio (input_file, output_format, ...)
+            max_workers: Conversiones simultáneas (por defecto, núcleos de CPU)
+        
+        Returns:
+            Rutas de los archivos convertidos (None si falló), en el orden de jobs
+        """
+        if not jobs:
+            return []
+        
+        workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ffmpeg') as executor:
+            return list(executor.map(lambda job: self.convert_audio(**job), jobs))
+    
+    def _build_convert_cmd(
+        self,
+        input_file: str,
+        output_file: str,
+        output_ext: str,
+        bitrate: str,
+        sample_rate: int,
+        channels: int,
+        copy: bool = False
+    ) -> list:
+        """Construir comando FFmpeg de conversión"""
+        cmd = self._base_cmd() + [
+            '-i', input_file,
+            '-vn',  # No video
+            '-y'  # Sobrescribir sin preguntar
+        ]
+        
+        if copy:
+            # Mismo códec y parámetros: solo remux, sin recodificar
+            cmd.extend(['-c:a', 'copy'])
+        else:
+            cmd.extend([
+                '-ar', str(sample_rate),
+                '-ac', str(channels),
+                '-threads', '0'  # Hilos del encoder según el códec
+            ])
+            cmd.extend(self._encoder_args(output_ext, bitrate))
+        
+        cmd.append(output_file)
+        return cmd
+    
+    def _can_stream_copy(
+        self,
+        input_file: str,
+        output_ext: str,
+        bitrate: str,
+        sample_rate: int,
+        channels: int
+    ) -> bool:
+        """Comprobar si la entrada ya tiene el códec y parámetros pedidos"""
+        if Path(input_file).suffix[1:].lower() != output_ext:
+            return False
+        
+        info = self.get_audio_info(input_file)
+        if not info or info['codec'] != FORMAT_CODECS.get(output_ext):
+            return False
+        
+        if info['sample_rate'] != sample_rate or info['channels'] != channels:
+            return False
+        
+        if output_ext in LOSSLESS_FORMATS:
+            return True
+        
+        # Recodificar a un bitrate mayor no recupera calidad
+        try:
+            requested_kbps = int(str(bitrate).lower().rstrip('k'))
+        except ValueError:
+            return False
+        return 0 < info['bitrate'] <= requested_kbps
+    
+    def _encoder_args(self, output_ext: str, bitrate: str) -> list:
+        """Parámetros del encoder según el formato de salida"""
+        if output_ext in ['mp3', 'aac', 'opus']:
+            return ['-b:a', bitrate]
+        elif output_ext == 'flac':
+            return ['-compression_level', '5']
+        return []
+    
+    def _base_cmd(self, loglevel: str = 'error') -> list:
+        """Inicio común de los comandos FFmpeg (sin stdin, log reducido)"""
+        return [
+            self.ffmpeg_path,
+            '-nostdin',
+            '-hide_banner',
+            '-loglevel', loglevel
+        ]
+    
+    def _run_ffmpeg(
+        self,
+        cmd: list,
+        timeout: Optional[float] = None,
+        input: Optional[str] = None
+    ) -> subprocess.CompletedProcess:
+        """
+        Ejecutar FFmpeg leyendo stderr línea a línea
+        
+        Solo se conservan las últimas líneas de stderr (para diagnóstico), así
+        que la memoria no crece con la duración del proceso. Si se indica
+        input, se envía por stdin (por ejemplo, para leer de pipe:0).
+        
+        Raises:
+            subprocess.TimeoutExpired: si FFmpeg no termina dentro de timeout
+        """
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL if input is None else subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors='replace'
+        )
+        
+        if input is not None:
+            # Escribir stdin en otro hilo para no bloquear la lectura de stderr
+            def feed():
+                try:
+                    process.stdin.write(input)
+                    process.stdin.close()
+                except OSError:
+                    pass
+            
+            threading.Thread(target=feed, daemon=True).start()
+        
+        timed_out = threading.Event()
+        
+        def kill():
+            timed_out.set()
+            process.kill()
+        
+        timer = threading.Timer(timeout, kill) if timeout else None
+        if timer:
+            timer.daemon = True
+            timer.start()
+        
+        stderr_tail = deque(maxlen=FFMPEG_STDERR_LINES)
+        try:
+            for line in process.stderr:
+                stderr_tail.append(line)
+            returncode = process.wait()
+        finally:
+            if timer:
+                timer.cancel()
+            process.stderr.close()
+        
+        stderr = ''.join(stderr_tail)
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(cmd, timeout, stderr=stderr)
+        
+        return subprocess.CompletedProcess(cmd, returncode, stderr=stderr)
+    
     def extract_audio_from_video(self, video_file: str, **kwargs) -> Optional[str]:
         """Extraer audio de archivo de video"""
         return self.convert_audio(video_file, **kwargs)
@@ -158,57 +357,84 @@ class AudioProcessor:
             output_file = tmp_file.name
         
         try:
-            # Normalizar usando ebur128 filter de FFmpeg
-            cmd = [
-                self.ffmpeg_path,
+            loudnorm = self._loudnorm_filter(target_lufs)
+            
+            # Primera pasada: medir el loudness actual
+            # loudnorm imprime sus mediciones con nivel info
+            cmd = self._base_cmd(loglevel='info') + [
                 '-i', input_file,
-                '-filter_complex', f'loudnorm=I={target_lufs}:TP=-1.5:LRA=11:print_format=json',
+                '-af', f'{loudnorm}:print_format=json',
                 '-f', 'null', '-'
             ]
             
-            # Primero medir el loudness actual
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
+            result = self._run_ffmpeg(cmd, timeout=60)
             
             if result.returncode != 0:
                 logger.error(f"Error midiendo loudness: {result.stderr}")
+                _safe_unlink(output_file)
                 return None
             
-            # Extraer mediciones del output (simplificado)
-            # En implementación real, parsear JSON del output
+            # Segunda pasada: aplicar la corrección lineal con las mediciones
+            measured = self._parse_loudnorm_stats(result.stderr)
+            if not measured:
+                logger.warning("No se pudieron leer las mediciones de loudnorm, usando modo dinámico")
+            loudnorm = self._loudnorm_filter(target_lufs, measured)
             
-            # Aplicar normalización
-            cmd = [
-                self.ffmpeg_path,
+            cmd = self._base_cmd() + [
                 '-i', input_file,
-                '-af', f'loudnorm=I={target_lufs}:TP=-1.5:LRA=11',
+                '-af', loudnorm,
+                '-threads', '0',
                 '-y',
                 output_file
             ]
             
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300
-            )
+            result = self._run_ffmpeg(cmd, timeout=300)
             
             if result.returncode != 0:
                 logger.error(f"Error normalizando audio: {result.stderr}")
-                os.unlink(output_file)
+                _safe_unlink(output_file)
                 return None
             
             return output_file
             
         except Exception as e:
             logger.error(f"Error en normalización: {e}")
-            if os.path.exists(output_file):
-                os.unlink(output_file)
+            _safe_unlink(output_file)
+            return None
+    
+    def _loudnorm_filter(
+        self,
+        target_lufs: float,
+        measured: Optional[Dict[str, str]] = None
+    ) -> str:
+        """Filtro loudnorm, con corrección lineal si hay mediciones previas"""
+        loudnorm = f'loudnorm=I={target_lufs}:TP=-1.5:LRA=11'
+        if measured:
+            loudnorm += (
+                f":measured_I={measured['input_i']}"
+                f":measured_LRA={measured['input_lra']}"
+                f":measured_TP={measured['input_tp']}"
+                f":measured_thresh={measured['input_thresh']}"
+                f":offset={measured['target_offset']}"
+                ":linear=true"
+            )
+        return loudnorm
+    
+    def _parse_loudnorm_stats(self, output: str) -> Optional[Dict[str, str]]:
+        """Extraer el bloque JSON que imprime loudnorm al final de la medición"""
+        match = _LOUDNORM_JSON_RE.search(output)
+        if not match:
+            return None
+        
+        try:
+            stats = json.loads(match.group(0))
+        except json.JSONDecodeError:
+            return None
+        
+        required = ('input_i', 'input_lra', 'input_tp', 'input_thresh', 'target_offset')
+        if not all(key in stats for key in required):
             return None
+        return stats
     
     def get_audio_info(self, filepath: str) -> Optional[Dict[str, Any]]:
         """
@@ -220,60 +446,95 @@ class AudioProcessor:
         Returns:
             Diccionario con información del audio
         """
-        if not self.ffmpeg_path:
+        if not self.ffprobe_path:
+            return None
+        
+        try:
+            st = os.stat(filepath)
+        except OSError as e:
+            logger.error(f"Error obteniendo info de audio: {e}")
+            self.invalidate(filepath)
             return None
         
+        # El resultado sigue siendo válido mientras no cambien mtime ni tamaño
+        with self._info_cache_lock:
+            cached = self._info_cache.get(filepath)
+            if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+                self._info_cache.move_to_end(filepath)
+                return dict(cached[2])
+        
+        info = self._probe(filepath)
+        if info is None:
+            return None
+        
+        with self._info_cache_lock:
+            self._info_cache[filepath] = (st.st_mtime_ns, st.st_size, info)
+            self._info_cache.move_to_end(filepath)
+            while len(self._info_cache) > AUDIO_INFO_CACHE_SIZE:
+                self._info_cache.popitem(last=False)
+        
+        return dict(info)
+    
+    def invalidate(self, filepath: Optional[str] = None):
+        """Descartar la info en caché de un archivo (o de todos si no se indica)"""
+        with self._info_cache_lock:
+            if filepath is None:
+                self._info_cache.clear()
+            else:
+                self._info_cache.pop(filepath, None)
+    
+    def _probe(self, filepath: str) -> Optional[Dict[str, Any]]:
+        """Analizar el archivo con FFprobe"""
         try:
             cmd = [
-                self.ffmpeg_path,
-                '-i', filepath,
-                '-hide_banner',
-                '-f', 'null', '-'
+                self.ffprobe_path,
+                '-v', 'error',
+                '-print_format', 'json',
+                '-show_format',
+                '-show_streams',
+                filepath
             ]
             
             result = subprocess.run(
                 cmd,
                 capture_output=True,
-                text=True
+                text=True,
+                timeout=30
             )
             
-            # Parsear output de FFmpeg para extraer información
-            import re
+            if result.returncode != 0:
+                logger.error(f"Error analizando audio: {result.stderr}")
+                return None
+            
+            data = json.loads(result.stdout)
+            fmt = data.get('format', {})
+            audio_stream = next(
+                (stream for stream in data.get('streams', []) if stream.get('codec_type') == 'audio'),
+                {}
+            )
             
-            info = {
+            return {
                 'filepath': filepath,
-                'filesize': os.path.getsize(filepath),
-                'duration': 0,
-                'bitrate': 0,
-                'sample_rate': 0,
-                'channels': 0,
+                'filesize': int(fmt.get('size') or os.path.getsize(filepath)),
+                'duration': float(fmt.get('duration') or 0),
+                'bitrate': int(fmt.get('bit_rate') or 0) // 1000,  # kb/s
+                'sample_rate': int(audio_stream.get('sample_rate') or 0),
+                'channels': int(audio_stream.get('channels') or 0),
+                'codec': audio_stream.get('codec_name'),
                 'format': Path(filepath).suffix[1:].lower()
             }
             
-            # Buscar duración
-            duration_match = re.search(r'Duration:\s*(\d{2}):(\d{2}):(\d{2}\.\d+)', result.stderr)
-            if duration_match:
-                hours, minutes, seconds = duration_match.groups()
-                info['duration'] = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
-            
-            # Buscar información de audio stream
-            audio_match = re.search(r'Stream.*Audio:.*?(\d+)\s*Hz.*?(\d+)\s*ch', result.stderr)
-            if audio_match:
-                info['sample_rate'] = int(audio_match.group(1))
-                info['channels'] = int(audio_match.group(2))
-            
-            # Buscar bitrate
-            bitrate_match = re.search(r'bitrate:\s*(\d+)\s*kb/s', result.stderr)
-            if bitrate_match:
-                info['bitrate'] = int(bitrate_match.group(1))
-            
-            return info
-            
         except Exception as e:
             logger.error(f"Error obteniendo info de audio: {e}")
             return None
     
-    def trim_audio(self, input_file: str, start_time: float, end_time: float) -> Optional[str]:
+    def trim_audio(
+        self,
+        input_file: str,
+        start_time: float,
+        end_time: float,
+        precise: bool = False
+    ) -> Optional[str]:
         """
         Recortar segmento de audio
         
@@ -281,6 +542,8 @@ class AudioProcessor:
             input_file: Ruta del archivo de entrada
             start_time: Tiempo de inicio en segundos
             end_time: Tiempo de fin en segundos
+            precise: Recodificar para un corte exacto a nivel de muestra
+                (por defecto se copia el stream, cortando en el frame más cercano)
         
         Returns:
             Ruta del archivo recortado
@@ -300,33 +563,160 @@ class AudioProcessor:
             output_file = tmp_file.name
         
         try:
-            cmd = [
-                self.ffmpeg_path,
-                '-i', input_file,
-                '-ss', str(start_time),
-                '-t', str(duration),
-                '-y',
-                output_file
-            ]
+            if precise:
+                # Seek tras -i: decodifica desde el inicio y recodifica
+                cmd = self._base_cmd() + [
+                    '-i', input_file,
+                    '-ss', str(start_time),
+                    '-t', str(duration),
+                    '-threads', '0'
+                ]
+            else:
+                # Seek antes de -i: salta por el índice del contenedor, sin recodificar
+                cmd = self._base_cmd() + [
+                    '-ss', str(start_time),
+                    '-t', str(duration),
+                    '-i', input_file,
+                    '-c', 'copy'
+                ]
+            cmd.extend(['-y', output_file])
             
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300
-            )
+            result = self._run_ffmpeg(cmd, timeout=300)
             
             if result.returncode != 0:
                 logger.error(f"Error recortando audio: {result.stderr}")
-                os.unlink(output_file)
+                _safe_unlink(output_file)
                 return None
             
             return output_file
             
         except Exception as e:
             logger.error(f"Error en trim de audio: {e}")
-            if os.path.exists(output_file):
-                os.unlink(output_file)
+            _safe_unlink(output_file)
+            return None
+    
+    def process_pipeline(self, input_file: str, ops: List[Dict[str, Any]]) -> Optional[str]:
+        """
+        Aplicar varias operaciones en una sola invocación de FFmpeg
+        
+        Evita decodificar y escribir un archivo temporal por cada operación
+        (trim -> normalize -> convert).
+        
+        Args:
+            input_file: Ruta del archivo de entrada
+            ops: Lista de operaciones, por ejemplo:
+                [{'op': 'trim', 'start': 10, 'end': 40},
+                 {'op': 'loudnorm', 'I': -14},
+                 {'op': 'convert', 'format': 'mp3', 'bitrate': '192k'}]
+        
+        Returns:
+            Ruta del archivo procesado o None si hay error
+        """
+        if not self.ffmpeg_path:
+            logger.error("FFmpeg no está disponible")
+            return None
+        
+        if not os.path.exists(input_file):
+            logger.error(f"Archivo de entrada no existe: {input_file}")
+            return None
+        
+        input_ext = Path(input_file).suffix[1:].lower()
+        seek_args = []
+        filters = []
+        loudnorm_target = None
+        convert = {}
+        
+        for op in ops:
+            name = op.get('op')
+            if name == 'trim':
+                start = float(op.get('start', 0))
+                seek_args = ['-ss', str(start)]
+                if op.get('end') is not None:
+                    seek_args += ['-t', str(float(op['end']) - start)]
+            elif name == 'loudnorm':
+                loudnorm_target = float(op.get('I', -14.0))
+            elif name == 'convert':
+                convert = op
+            else:
+                logger.error(f"Operación de pipeline no soportada: {name}")
+                return None
+        
+        output_ext = (convert.get('format') or input_ext).lower()
+        sample_rate = convert.get('sample_rate')
+        channels = convert.get('channels')
+        
+        # Solo cambio de contenedor (o recorte): remux sin recodificar
+        copy = loudnorm_target is None and (
+            convert.get('copy') or (
+                output_ext == input_ext
+                and not convert.get('bitrate')
+                and not sample_rate
+                and not channels
+            )
+        )
+        
+        # Crear archivo temporal para salida
+        with tempfile.NamedTemporaryFile(
+            suffix=f'_processed.{output_ext}',
+            delete=False,
+            dir=Config.ABS_CACHE_DIR
+        ) as tmp_file:
+            output_file = tmp_file.name
+        
+        try:
+            # El seek va antes de -i para que FFmpeg salte directamente
+            input_args = seek_args + ['-i', input_file, '-vn']
+            
+            if loudnorm_target is not None:
+                # Pasada de medición sobre el mismo segmento (sin escribir a disco)
+                cmd = self._base_cmd(loglevel='info') + input_args + [
+                    '-af', f'{self._loudnorm_filter(loudnorm_target)}:print_format=json',
+                    '-f', 'null', '-'
+                ]
+                result = self._run_ffmpeg(cmd, timeout=300)
+                if result.returncode != 0:
+                    logger.error(f"Error midiendo loudness: {result.stderr}")
+                    _safe_unlink(output_file)
+                    return None
+                
+                measured = self._parse_loudnorm_stats(result.stderr)
+                if not measured:
+                    logger.warning("No se pudieron leer las mediciones de loudnorm, usando modo dinámico")
+                filters.append(self._loudnorm_filter(loudnorm_target, measured))
+                # loudnorm trabaja a 192 kHz internamente
+                filters.append(f'aresample={sample_rate or 44100}')
+            
+            cmd = self._base_cmd() + input_args
+            if copy:
+                cmd.extend(['-c', 'copy'])
+            else:
+                if filters:
+                    cmd.extend(['-af', ','.join(filters)])
+                if sample_rate:
+                    cmd.extend(['-ar', str(sample_rate)])
+                if channels:
+                    cmd.extend(['-ac', str(channels)])
+                cmd.extend(['-threads', '0'])
+                cmd.extend(self._encoder_args(output_ext, convert.get('bitrate') or '192k'))
+            cmd.extend(['-y', output_file])
+            
+            logger.info(f"Ejecutando: {' '.join(cmd)}")
+            result = self._run_ffmpeg(cmd, timeout=300)
+            
+            if result.returncode != 0:
+                logger.error(f"Error en pipeline de audio: {result.stderr}")
+                _safe_unlink(output_file)
+                return None
+            
+            return output_file
+            
+        except subprocess.TimeoutExpired:
+            logger.error("Timeout en pipeline de audio")
+            _safe_unlink(output_file)
+            return None
+        except Exception as e:
+            logger.error(f"Error en pipeline de audio: {e}")
+            _safe_unlink(output_file)
             return None
     
     def merge_audio_files(self, file_list: list, output_format: str = 'mp3') -> Optional[str]:
@@ -343,12 +733,24 @@ class AudioProcessor:
         if not self.ffmpeg_path or len(file_list) < 2:
             return None
         
-        # Crear lista de archivos temporal
-        import tempfile
-        list_file = tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False)
-        for filepath in file_list:
-            list_file.write(f"file '{os.path.abspath(filepath)}'\n")
-        list_file.close()
+        # El concat con -c copy exige el mismo códec, tasa y canales en todas las entradas
+        if self.ffprobe_path:
+            infos = [self.get_audio_info(filepath) for filepath in file_list]
+            if any(info is None for info in infos):
+                logger.error("No se pudo analizar alguno de los archivos a combinar")
+                return None
+            
+            streams = {(info['codec'], info['sample_rate'], info['channels']) for info in infos}
+            if len(streams) > 1:
+                logger.error(f"Los archivos a combinar no son compatibles: {sorted(streams, key=str)}")
+                return None
+        
+        # Lista para el demuxer concat, enviada por stdin (comillas simples escapadas).
+        # El prefijo file: evita que FFmpeg resuelva las rutas relativas a pipe:
+        manifest = ''.join(
+            "file 'file:{}'\n".format(os.path.abspath(filepath).replace("'", "'\\''"))
+            for filepath in file_list
+        )
         
         # Crear archivo de salida
         with tempfile.NamedTemporaryFile(
@@ -359,40 +761,28 @@ class AudioProcessor:
             output_file = tmp_file.name
         
         try:
-            cmd = [
-                self.ffmpeg_path,
+            cmd = self._base_cmd() + [
                 '-f', 'concat',
                 '-safe', '0',
-                '-i', list_file.name,
+                '-protocol_whitelist', 'file,pipe',
+                '-i', 'pipe:0',
                 '-c', 'copy',
                 '-y',
                 output_file
             ]
             
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=600  # 10 minutos timeout
-            )
-            
-            # Limpiar archivo de lista
-            os.unlink(list_file.name)
+            result = self._run_ffmpeg(cmd, timeout=600, input=manifest)  # 10 minutos timeout
             
             if result.returncode != 0:
                 logger.error(f"Error combinando audio: {result.stderr}")
-                if os.path.exists(output_file):
-                    os.unlink(output_file)
+                _safe_unlink(output_file)
                 return None
             
             return output_file
             
         except Exception as e:
             logger.error(f"Error combinando archivos: {e}")
-            if os.path.exists(list_file.name):
-                os.unlink(list_file.name)
-            if os.path.exists(output_file):
-                os.unlink(output_file)
+            _safe_unlink(output_file)
             return None
     
     def is_ffmpeg_available(self) -> bool:
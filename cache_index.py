@@ -0,0 +1,130 @@
+import os
+import json
+import logging
+import threading
+from typing import Dict, Any, Iterator, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Extensiones de audio que se contabilizan en el caché
+AUDIO_EXTENSIONS = frozenset(('mp3', 'm4a', 'webm', 'opus', 'flac'))
+
+class CacheIndex:
+    """Índice persistente de los archivos de audio en caché"""
+
+    def __init__(self, index_file: str = None, cache_dir: str = None):
+        self.index_file = index_file or os.path.join(Config.DATA_DIR, 'cache_index.json')
+        self.cache_dir = cache_dir or Config.ABS_CACHE_DIR
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._total_size = 0
+        self._by_platform: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+        if not self.load():
+            self.rebuild()
+
+    def add(self, platform: str, path: str, size: int):
+        """Registrar (o actualizar) un archivo en el índice"""
+        with self._lock:
+            self._discard(path)
+            self._insert(platform, path, size)
+            self._save()
+
+    def remove(self, *paths: str) -> int:
+        """Quitar archivos del índice, devuelve cuántos estaban indexados"""
+        with self._lock:
+            removed = sum(1 for path in paths if self._discard(path))
+            if removed:
+                self._save()
+            return removed
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Obtener resumen del caché sin recorrer el disco"""
+        with self._lock:
+            return {
+                'total_size': self._total_size,
+                'file_count': len(self.entries),
+                'by_platform': {
+                    platform: dict(stats) for platform, stats in self._by_platform.items()
+                },
+                'total_size_mb': self._total_size / (1024 * 1024)
+            }
+
+    def rebuild(self) -> Dict[str, Any]:
+        """Reconstruir el índice recorriendo el directorio de caché"""
+        with self._lock:
+            self._reset()
+            if os.path.isdir(self.cache_dir):
+                for platform, path, size in self._scan(self.cache_dir):
+                    self._insert(platform, path, size)
+            self._save()
+
+        logger.info(f"Índice de caché reconstruido: {len(self.entries)} archivos")
+        return self.snapshot()
+
+    def load(self) -> bool:
+        """Cargar índice desde archivo JSON"""
+        if not os.path.exists(self.index_file):
+            return False
+
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Error cargando índice de caché: {e}")
+            return False
+
+        with self._lock:
+            self._reset()
+            for path, entry in data.get('entries', {}).items():
+                self._insert(entry.get('platform', 'other'), path, entry.get('size', 0))
+        return True
+
+    def _save(self):
+        """Guardar índice con escritura atómica (requiere el lock)"""
+        temp_file = self.index_file + '.tmp'
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({'entries': self.entries}, f)
+            os.replace(temp_file, self.index_file)
+        except Exception as e:
+            logger.error(f"Error guardando índice de caché: {e}")
+
+    def _reset(self):
+        self.entries = {}
+        self._total_size = 0
+        self._by_platform = {}
+
+    def _insert(self, platform: str, path: str, size: int):
+        self.entries[path] = {'platform': platform, 'size': size}
+        self._total_size += size
+        stats = self._by_platform.setdefault(platform, {'size': 0, 'count': 0})
+        stats['size'] += size
+        stats['count'] += 1
+
+    def _discard(self, path: str) -> bool:
+        entry = self.entries.pop(path, None)
+        if entry is None:
+            return False
+
+        self._total_size -= entry['size']
+        stats = self._by_platform[entry['platform']]
+        stats['size'] -= entry['size']
+        stats['count'] -= 1
+        if stats['count'] <= 0:
+            del self._by_platform[entry['platform']]
+        return True
+
+    def _scan(self, path: str, platform: str = None) -> Iterator[Tuple[str, str, int]]:
+        """Recorrer el caché con os.scandir devolviendo (plataforma, ruta, tamaño)"""
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    # La plataforma es el primer subdirectorio bajo el caché
+                    yield from self._scan(entry.path, platform or entry.name)
+                else:
+                    _, dot, ext = entry.name.rpartition('.')
+                    if dot and ext.lower() in AUDIO_EXTENSIONS:
+                        yield platform or 'other', entry.path, entry.stat().st_size
@@ -1,4 +1,5 @@
 import os
+from pathlib import Path
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
@@ -15,10 +16,10 @@ class Config:
     MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 16777216))  # 16MB
     
     # Directorios
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+    BASE_DIR = Path(__file__).resolve().parent
     AUDIO_CACHE_DIR = os.environ.get('AUDIO_CACHE_DIR', 'audio_cache')
-    ABS_CACHE_DIR = os.path.join(BASE_DIR, AUDIO_CACHE_DIR)
-    DATA_DIR = os.path.join(BASE_DIR, 'data')
+    ABS_CACHE_DIR = BASE_DIR / AUDIO_CACHE_DIR
+    DATA_DIR = BASE_DIR / 'data'
     
     # Configuración de calidad de audio
     AUDIO_QUALITIES = {
@@ -54,23 +55,45 @@ class Config:
         'no_color': True,
     }
     
+    # Descargas en segundo plano
+    DOWNLOAD_WORKERS = int(os.environ.get('DOWNLOAD_WORKERS', 4))
+    STREAM_DOWNLOAD_WAIT = float(os.environ.get('STREAM_DOWNLOAD_WAIT', 20))  # segundos, clientes que piden JSON
+    STREAM_MEDIA_WAIT = float(os.environ.get('STREAM_MEDIA_WAIT', 90))  # segundos, <audio> (menos que el timeout de gunicorn)
+    PREFETCH_TRACKS = int(os.environ.get('PREFETCH_TRACKS', 1))  # pistas siguientes a descargar
+    
+    # Extracción de información
+    INFO_WORKERS = int(os.environ.get('INFO_WORKERS', 8))
+    INFO_BATCH_MAX = int(os.environ.get('INFO_BATCH_MAX', 50))
+    INFO_CACHE_TTL = int(os.environ.get('INFO_CACHE_TTL', 86400))  # segundos, también en disco
+    INFO_CACHE_SIZE = 1024  # entradas en memoria
+    PLAYLIST_CONCURRENCY = int(os.environ.get('PLAYLIST_CONCURRENCY', 8))
+    MAX_FORMATS = int(os.environ.get('MAX_FORMATS', 10))  # formatos de audio por pista
+    
+    # Compresión de respuestas: solo JSON, nunca el audio
+    COMPRESS_MIMETYPES = ['application/json']
+    COMPRESS_ALGORITHM = ['br', 'gzip']
+    COMPRESS_MIN_SIZE = 1024
+    
     # Configuración Redis/Celery (si se usa procesamiento en background)
     REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
     CELERY_BROKER_URL = REDIS_URL
     CELERY_RESULT_BACKEND = REDIS_URL
+    CELERY_WORKER_CONCURRENCY = int(os.environ.get('CELERY_WORKER_CONCURRENCY', 5))
+    CELERY_RESULT_EXPIRES = int(os.environ.get('CELERY_RESULT_EXPIRES', 3600))  # segundos
     
     @classmethod
     def init_app(cls, app):
         """Inicializar configuración en la app Flask"""
         # Crear directorios necesarios
-        os.makedirs(cls.ABS_CACHE_DIR, exist_ok=True)
-        os.makedirs(cls.DATA_DIR, exist_ok=True)
-        os.makedirs(os.path.join(cls.BASE_DIR, 'logs'), exist_ok=True)
+        for directory in (cls.ABS_CACHE_DIR, cls.DATA_DIR, cls.BASE_DIR / 'logs'):
+            directory.mkdir(parents=True, exist_ok=True)
         
-        # Configurar subdirectorios por plataforma
+        # Configurar subdirectorios por plataforma (solo crear los que faltan)
+        with os.scandir(cls.ABS_CACHE_DIR) as entries:
+            existing = {entry.name for entry in entries if entry.is_dir()}
         for platform in cls.ALLOWED_PLATFORMS:
-            platform_dir = os.path.join(cls.ABS_CACHE_DIR, platform)
-            os.makedirs(platform_dir, exist_ok=True)
+            if platform not in existing:
+                (cls.ABS_CACHE_DIR / platform).mkdir(exist_ok=True)
         
         # Configurar app
         app.config.from_object(cls)
\ No newline at end of file
@@ -0,0 +1,21 @@
+import os
+
+# Configuración de Gunicorn para producción (se carga automáticamente)
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+
+# Un solo proceso: la playlist, el índice de caché y las descargas en curso
+# viven en memoria; la concurrencia se obtiene con hilos (gthread)
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+
+# Sin preload_app: la app (y su hilo de logging) se inicializa en cada worker
+preload_app = False
+
+# Las descargas pueden tardar en el primer stream de un track
+timeout = 120
+keepalive = 5
+
+# Heartbeat del worker en memoria en lugar de disco
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
@@ -1,16 +1,28 @@
 import os
-import json
 import logging
-from typing import List, Dict, Any, Optional
+import random
+import threading
+import itertools
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
-import hashlib
-from dataclasses import dataclass, asdict
+import secrets
+from dataclasses import dataclass
 from enum import Enum
 
+import orjson
+import xxhash
+
 from config import Config
 
 logger = logging.getLogger(__name__)
 
+# Segundos que se agrupan los guardados diferidos (eventos de reproducción)
+SAVE_DEBOUNCE = 0.5
+
+# Versiones de Track.to_dict (next() sobre count es atómico en CPython)
+_dict_versions = itertools.count(1)
+
 class PlaybackMode(Enum):
     NORMAL = "normal"
     REPEAT_ONE = "repeat_one"
@@ -34,13 +46,47 @@ class Track:
     played: bool = False
     play_count: int = 0
     
+    # Serialización cacheada como (versión, dict); no son campos del dataclass
+    _dict_cache = None
+    _dict_version = 0
+    
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        # Cualquier asignación invalida el diccionario cacheado. Se cambia la
+        # versión después de asignar: un dict armado en otro hilo con datos
+        # anteriores queda con la versión vieja y no se vuelve a entregar
+        if name not in ('_dict_cache', '_dict_version'):
+            super().__setattr__('_dict_version', next(_dict_versions))
+    
     def to_dict(self):
-        """Convertir a diccionario"""
-        data = asdict(self)
-        # Convertir enum a string
-        if 'platform' in data and hasattr(data['platform'], 'value'):
-            data['platform'] = data['platform'].value
-        return data
+        """
+        Convertir a diccionario
+        
+        El resultado se reutiliza hasta la próxima asignación de un atributo;
+        no debe modificarse, y los cambios in-place en metadata no lo invalidan.
+        """
+        version = self._dict_version
+        cached = self._dict_cache
+        if cached is None or cached[0] != version:
+            # Diccionario literal: evita la copia recursiva de asdict()
+            cached = (version, {
+                'id': self.id,
+                'url': self.url,
+                'title': self.title,
+                'artist': self.artist,
+                'duration': self.duration,
+                # Convertir enum a string
+                'platform': getattr(self.platform, 'value', self.platform),
+                'thumbnail': self.thumbnail,
+                'filepath': self.filepath,
+                'metadata': dict(self.metadata) if self.metadata is not None else None,
+                'added_at': self.added_at,
+                'order': self.order,
+                'played': self.played,
+                'play_count': self.play_count
+            })
+            self._dict_cache = cached
+        return cached[1]
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]):
@@ -57,9 +103,22 @@ class Playlist:
     def __init__(self, playlist_file: str = None):
         self.playlist_file = playlist_file or os.path.join(Config.DATA_DIR, 'playlist.json')
         self.tracks: List[Track] = []
+        self._by_id: Dict[str, int] = {}  # id -> índice en tracks
         self.current_index: int = -1
         self.playback_mode: PlaybackMode = PlaybackMode.NORMAL
         self.shuffle_order: List[int] = []
+        self._shuffle_pos: int = -1  # posición de la pista actual en shuffle_order
+        
+        # Totales para get_stats, mantenidos en cada modificación
+        self._total_duration = 0
+        self._total_plays = 0
+        
+        # Guardado: cambios pendientes, lotes abiertos y temporizador diferido
+        self._dirty = False
+        self._save_suspended = 0
+        self._save_timer: Optional[threading.Timer] = None
+        self._save_lock = threading.Lock()
+        self._last_hash: Optional[int] = None  # hash del último estado escrito
         
         self.load()
     
@@ -74,10 +133,10 @@ class Playlist:
         Returns:
             Track object
         """
-        # Generar ID único
-        track_id = hashlib.md5(
-            f"{track_data.get('url')}_{datetime.now().isoformat()}".encode()
-        ).hexdigest()[:12]
+        # Generar ID único (48 bits aleatorios, sin repetir los existentes)
+        track_id = secrets.token_hex(6)
+        while track_id in self._by_id:
+            track_id = secrets.token_hex(6)
         
         # Crear objeto Track
         track = Track(
@@ -99,38 +158,38 @@ class Playlist:
         # Insertar en posición específica o al final
         if position is not None and 0 <= position < len(self.tracks):
             self.tracks.insert(position, track)
-            # Actualizar órdenes
-            for i, t in enumerate(self.tracks):
-                t.order = i
+            # Actualizar órdenes e índices desde la posición insertada
+            self._reindex(position)
         else:
             track.order = len(self.tracks)
             self.tracks.append(track)
+            self._by_id[track.id] = track.order
         
+        self._total_duration += track.duration or 0
         self.save()
         return track
     
     def add_multiple(self, tracks_data: List[Dict[str, Any]]) -> List[Track]:
-        """Agregar múltiples pistas"""
-        added_tracks = []
-        for track_data in tracks_data:
-            track = self.add_track(track_data)
-            added_tracks.append(track)
-        return added_tracks
+        """Agregar múltiples pistas (un solo guardado al final)"""
+        with self.batch():
+            return [self.add_track(track_data) for track_data in tracks_data]
     
     def remove_track(self, track_id: str) -> bool:
         """Remover una pista por ID"""
-        for i, track in enumerate(self.tracks):
-            if track.id == track_id:
-                self.tracks.pop(i)
-                # Actualizar índices
-                if self.current_index >= i:
-                    self.current_index = max(0, self.current_index - 1)
-                # Actualizar órdenes
-                for idx, t in enumerate(self.tracks):
-                    t.order = idx
-                self.save()
-                return True
-        return False
+        i = self._by_id.pop(track_id, None)
+        if i is None:
+            return False
+        
+        track = self.tracks.pop(i)
+        self._total_duration -= track.duration or 0
+        self._total_plays -= track.play_count
+        # Actualizar índices
+        if self.current_index >= i:
+            self.current_index = max(0, self.current_index - 1)
+        # Actualizar órdenes de las pistas desplazadas
+        self._reindex(i)
+        self.save()
+        return True
     
     def move_track(self, track_id: str, new_position: int) -> bool:
         """Mover una pista a nueva posición"""
@@ -138,37 +197,34 @@ class Playlist:
             return False
         
         # Encontrar track
-        for i, track in enumerate(self.tracks):
-            if track.id == track_id:
-                if i == new_position:
-                    return True
-                
-                # Remover y reinsertar
-                track = self.tracks.pop(i)
-                self.tracks.insert(new_position, track)
-                
-                # Actualizar órdenes
-                for idx, t in enumerate(self.tracks):
-                    t.order = idx
-                
-                # Actualizar current_index
-                if self.current_index == i:
-                    self.current_index = new_position
-                elif i < self.current_index <= new_position:
-                    self.current_index -= 1
-                elif new_position <= self.current_index < i:
-                    self.current_index += 1
-                
-                self.save()
-                return True
-        return False
+        i = self._by_id.get(track_id)
+        if i is None:
+            return False
+        if i == new_position:
+            return True
+        
+        # Remover y reinsertar
+        track = self.tracks.pop(i)
+        self.tracks.insert(new_position, track)
+        
+        # Actualizar órdenes (solo cambia el tramo entre ambas posiciones)
+        self._reindex(min(i, new_position), max(i, new_position) + 1)
+        
+        # Actualizar current_index
+        if self.current_index == i:
+            self.current_index = new_position
+        elif i < self.current_index <= new_position:
+            self.current_index -= 1
+        elif new_position <= self.current_index < i:
+            self.current_index += 1
+        
+        self.save()
+        return True
     
     def get_track(self, track_id: str) -> Optional[Track]:
         """Obtener track por ID"""
-        for track in self.tracks:
-            if track.id == track_id:
-                return track
-        return None
+        idx = self._by_id.get(track_id)
+        return self.tracks[idx] if idx is not None else None
     
     def get_current_track(self) -> Optional[Track]:
         """Obtener track actual"""
@@ -176,6 +232,28 @@ class Playlist:
             return self.tracks[self.current_index]
         return None
     
+    def upcoming_tracks(self, count: int = 1) -> List[Track]:
+        """Pistas que sonarán a continuación según el modo de reproducción"""
+        total = len(self.tracks)
+        # En repeat_one vuelve a sonar la pista actual, no hay nada nuevo que preparar
+        if not total or count <= 0 or self.playback_mode == PlaybackMode.REPEAT_ONE:
+            return []
+        
+        if self.playback_mode == PlaybackMode.SHUFFLE and len(self.shuffle_order) == total:
+            pos = self._current_shuffle_pos()
+            indices = [
+                self.shuffle_order[(pos + i) % total]
+                for i in range(1, count + 1)
+            ]
+        else:
+            indices = range(self.current_index + 1, self.current_index + 1 + count)
+            if self.playback_mode == PlaybackMode.REPEAT_ALL:
+                indices = [i % total for i in indices]
+            else:
+                indices = [i for i in indices if i < total]
+        
+        return [self.tracks[i] for i in dict.fromkeys(indices) if i != self.current_index]
+    
     def next_track(self) -> Optional[Track]:
         """Obtener siguiente track según modo de reproducción"""
         if not self.tracks:
@@ -194,9 +272,8 @@ class Playlist:
         
         track = self.get_current_track()
         if track:
-            track.played = True
-            track.play_count += 1
-        self.save()
+            self._mark_played(track)
+        self.save(defer=True)
         return track
     
     def previous_track(self) -> Optional[Track]:
@@ -213,93 +290,156 @@ class Playlist:
         
         track = self.get_current_track()
         if track:
-            track.played = True
-            track.play_count += 1
-        self.save()
+            self._mark_played(track)
+        self.save(defer=True)
         return track
     
     def set_current_track(self, track_id: str) -> bool:
         """Establecer track actual por ID"""
-        for i, track in enumerate(self.tracks):
-            if track.id == track_id:
-                self.current_index = i
-                track.played = True
-                track.play_count += 1
-                self.save()
-                return True
-        return False
+        i = self._by_id.get(track_id)
+        if i is None:
+            return False
+        
+        self.current_index = i
+        self._mark_played(self.tracks[i])
+        self.save(defer=True)
+        return True
     
     def clear(self):
         """Limpiar playlist"""
         self.tracks = []
+        self._by_id = {}
         self.current_index = -1
         self.shuffle_order = []
+        self._shuffle_pos = -1
+        self._total_duration = 0
+        self._total_plays = 0
         self.save()
     
     def shuffle(self):
         """Mezclar playlist"""
-        import random
-        indices = list(range(len(self.tracks)))
-        random.shuffle(indices)
-        self.shuffle_order = indices
+        self.shuffle_order = random.sample(range(len(self.tracks)), len(self.tracks))
+        self._shuffle_pos = -1
     
     def _get_next_shuffle(self) -> Optional[Track]:
         """Obtener siguiente track en modo shuffle"""
-        if not self.tracks or not self.shuffle_order:
+        if len(self.shuffle_order) != len(self.tracks):
             self.shuffle()
         
-        # Encontrar posición actual en shuffle_order
-        if self.current_index == -1:
-            next_idx = self.shuffle_order[0]
-        else:
-            try:
-                current_pos = self.shuffle_order.index(self.current_index)
-                next_pos = (current_pos + 1) % len(self.shuffle_order)
-                next_idx = self.shuffle_order[next_pos]
-            except ValueError:
-                next_idx = self.shuffle_order[0]
-        
-        self.current_index = next_idx
+        pos = self._current_shuffle_pos()
+        self._shuffle_pos = (pos + 1) % len(self.shuffle_order)
+        self.current_index = self.shuffle_order[self._shuffle_pos]
         track = self.get_current_track()
         if track:
-            track.played = True
-            track.play_count += 1
-        self.save()
+            self._mark_played(track)
+        self.save(defer=True)
         return track
     
-    def save(self):
+    def _current_shuffle_pos(self) -> int:
+        """Posición de la pista actual en shuffle_order (-1 si no está)"""
+        # Solo se busca si el puntero no corresponde a la pista actual
+        # (nueva mezcla o cambio manual)
+        pos = self._shuffle_pos
+        if 0 <= pos < len(self.shuffle_order) and self.shuffle_order[pos] == self.current_index:
+            return pos
+        try:
+            return self.shuffle_order.index(self.current_index)
+        except ValueError:
+            return -1
+    
+    @contextmanager
+    def batch(self):
+        """Agrupar varias modificaciones en un solo guardado"""
+        self._save_suspended += 1
+        try:
+            yield self
+        finally:
+            self._save_suspended -= 1
+            if self._dirty and self._save_suspended == 0:
+                self.flush()
+    
+    def save(self, defer: bool = False):
+        """
+        Marcar la playlist como modificada y guardarla
+        
+        Dentro de batch() el guardado se pospone al cerrar el lote; con
+        defer=True se agrupan los cambios de los próximos SAVE_DEBOUNCE segundos.
+        """
+        self._dirty = True
+        if self._save_suspended:
+            return
+        
+        if defer:
+            with self._save_lock:
+                if self._save_timer is None:
+                    self._save_timer = threading.Timer(SAVE_DEBOUNCE, self.flush)
+                    self._save_timer.daemon = True
+                    self._save_timer.start()
+            return
+        
+        self.flush()
+    
+    def flush(self):
+        """Escribir los cambios pendientes, si los hay"""
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+            self._write()
+    
+    def _write(self):
         """Guardar playlist a archivo JSON con escritura atómica"""
+        temp_file = self.playlist_file + '.tmp'
         try:
-            data = {
-                'tracks': [track.to_dict() for track in self.tracks],
-                'current_index': self.current_index,
-                'playback_mode': self.playback_mode.value,
-                'shuffle_order': self.shuffle_order,
-                'updated_at': datetime.now().isoformat()
-            }
+            # Una sola serialización, usada para el hash y para el archivo
+            body, digest = self._serialize()
+            
+            # Sin cambios desde la última escritura: no tocar el disco
+            if digest == self._last_hash:
+                return
+            
+            # updated_at queda fuera del hash: se antepone como primera clave
+            updated_at = orjson.dumps(datetime.now().isoformat())
             
             # Escritura atómica: escribir a temp y luego renombrar
-            temp_file = self.playlist_file + '.tmp'
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            with open(temp_file, 'wb') as f:
+                f.write(b'{\n  "updated_at": ' + updated_at + b',' + body[1:])
             
             os.replace(temp_file, self.playlist_file)
+            self._last_hash = digest
                 
         except Exception as e:
             logger.error(f"Error guardando playlist: {e}")
-            if os.path.exists(temp_file):
-                try:
-                    os.remove(temp_file)
-                except:
-                    pass
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
+    
+    def _serialize(self) -> Tuple[bytes, int]:
+        """Estado persistible serializado (sin marca de tiempo) y su hash"""
+        body = orjson.dumps(self._snapshot(), option=orjson.OPT_INDENT_2)
+        return body, xxhash.xxh3_64_intdigest(body)
+    
+    def _snapshot(self) -> Dict[str, Any]:
+        """Estado persistible de la playlist (sin marca de tiempo)"""
+        return {
+            'tracks': [track.to_dict() for track in self.tracks],
+            'current_index': self.current_index,
+            'playback_mode': self.playback_mode.value,
+            'shuffle_order': self.shuffle_order,
+            'shuffle_pos': self._shuffle_pos
+        }
     
     def load(self):
         """Cargar playlist desde archivo JSON de forma segura"""
         try:
             if os.path.exists(self.playlist_file):
                 try:
-                    with open(self.playlist_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
+                    with open(self.playlist_file, 'rb') as f:
+                        data = orjson.loads(f.read())
                     
                     self.tracks = [Track.from_dict(track_data) for track_data in data.get('tracks', [])]
                     self.current_index = data.get('current_index', -1)
@@ -311,12 +451,15 @@ class Playlist:
                         self.playback_mode = PlaybackMode.NORMAL
                     
                     self.shuffle_order = data.get('shuffle_order', [])
+                    self._shuffle_pos = data.get('shuffle_pos', -1)
                     
                     # Asegurar órdenes
-                    for i, track in enumerate(self.tracks):
-                        track.order = i
+                    self._by_id = {}
+                    self._reindex()
+                    
+                    self._last_hash = self._serialize()[1]
                         
-                except json.JSONDecodeError:
+                except orjson.JSONDecodeError:
                     logger.error(f"Error de formato JSON en playlist. Creando backup y reiniciando.")
                     # Backup archivo corrupto
                     backup_file = self.playlist_file + f".bak.{int(datetime.now().timestamp())}"
@@ -328,13 +471,33 @@ class Playlist:
                     
                     # Reiniciar estado
                     self.tracks = []
+                    self._by_id = {}
                     self.current_index = -1
                     self.shuffle_order = []
+                    self._shuffle_pos = -1
                     
         except Exception as e:
             logger.error(f"Error cargando playlist: {e}")
             self.tracks = []
+            self._by_id = {}
             self.current_index = -1
+        
+        self._total_duration = sum(track.duration or 0 for track in self.tracks)
+        self._total_plays = sum(track.play_count for track in self.tracks)
+    
+    def _mark_played(self, track: Track):
+        """Registrar una reproducción de la pista"""
+        track.played = True
+        track.play_count += 1
+        self._total_plays += 1
+    
+    def _reindex(self, start: int = 0, stop: Optional[int] = None):
+        """Actualizar orden e índice por ID de las pistas en tracks[start:stop]"""
+        stop = len(self.tracks) if stop is None else stop
+        for i in range(start, stop):
+            track = self.tracks[i]
+            track.order = i
+            self._by_id[track.id] = i
     
     def export_m3u(self, filepath: str) -> bool:
         """Exportar playlist a formato M3U"""
@@ -351,13 +514,10 @@ class Playlist:
     
     def get_stats(self) -> Dict[str, Any]:
         """Obtener estadísticas de la playlist"""
-        total_duration = sum(track.duration for track in self.tracks)
-        total_plays = sum(track.play_count for track in self.tracks)
-        
         return {
             'total_tracks': len(self.tracks),
-            'total_duration': total_duration,
-            'total_plays': total_plays,
+            'total_duration': self._total_duration,
+            'total_plays': self._total_plays,
             'current_index': self.current_index,
             'playback_mode': self.playback_mode.value,
             'has_current': self.get_current_track() is not None
@@ -1,26 +1,34 @@
 
 import sys
 import logging
-from youtube_dl_helper import AudioExtractor
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Use a known safe video (e.g., a creative commons video or official music video)
+DEFAULT_TEST_URL = "https://www.youtube.com/watch?v=BaW_jenozKc" # generic video
+
 def test_extraction(url):
+    # Import lazily: yt-dlp is heavy and only needed when the test actually runs
+    from youtube_dl_helper import AudioExtractor
+
     print(f"Testing extraction for: {url}")
     extractor = AudioExtractor()
     info = extractor.extract_info(url)
-    
+
     if 'error' in info:
         print(f"ERROR: {info['error']}")
-        sys.exit(1)
+        return 1
     else:
         print(f"SUCCESS: Found {info.get('title')}")
         print(f"Platform: {info.get('platform')}")
-        sys.exit(0)
+        return 0
+
+def main(argv=None):
+    # Configure logging
+    logging.basicConfig(level=logging.INFO)
+
+    argv = sys.argv[1:] if argv is None else argv
+    return test_extraction(argv[0] if argv else DEFAULT_TEST_URL)
 
 if __name__ == "__main__":
-    # Use a known safe video (e.g., a creative commons video or official music video)
-    test_url = "https://www.youtube.com/watch?v=BaW_jenozKc" # generic video
-    test_extraction(test_url)
+    sys.exit(main())
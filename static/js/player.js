@@ -49,7 +49,12 @@ class AudioPlayer {
 
     this.currentTrackId = track.id;
     // Use the API stream endpoint
-    this.audio.src = `/api/audio/stream/${track.id}`;
+    const streamUrl = `/api/audio/stream/${track.id}`;
+    await this._waitUntilDownloaded(streamUrl, track.id);
+    // Another track was selected while this one was downloading
+    if (this.currentTrackId !== track.id) return;
+
+    this.audio.src = streamUrl;
     this.audio.load();
 
     try {
@@ -59,6 +64,25 @@ class AudioPlayer {
     }
   }
 
+  async _waitUntilDownloaded(streamUrl, trackId) {
+    // The server answers 202 + Retry-After while it downloads the audio
+    try {
+      while (this.currentTrackId === trackId) {
+        const response = await fetch(streamUrl, {
+          method: "HEAD",
+          headers: { Accept: "application/json" },
+        });
+        if (response.status !== 202) return;
+
+        const retryAfter = parseInt(response.headers.get("Retry-After"), 10) || 2;
+        await new Promise((resolve) => setTimeout(resolve, retryAfter * 1000));
+      }
+    } catch (error) {
+      // Let the audio element report the failure
+      console.warn("Error checking audio download:", error);
+    }
+  }
+
   async play() {
     try {
       await this.audio.play();
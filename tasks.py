@@ -0,0 +1,73 @@
+import os
+from typing import Optional, List, Dict, Any
+
+from celery import Celery
+
+from config import Config
+from audio_processor import AudioProcessor
+
+# Procesamiento de audio fuera del proceso web, con acceso a su caché de audio
+# (ver Procfile y docker-compose.yml)
+#   celery -A tasks worker --loglevel=info
+celery = Celery(
+    'audio',
+    broker=Config.CELERY_BROKER_URL,
+    backend=Config.CELERY_RESULT_BACKEND
+)
+celery.conf.update(
+    worker_concurrency=Config.CELERY_WORKER_CONCURRENCY,
+    # Trabajos largos: cada worker toma uno a la vez y confirma al terminar
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    task_track_started=True,
+    result_expires=Config.CELERY_RESULT_EXPIRES
+)
+
+# Se crea al ejecutar la primera tarea: el proceso web importa este módulo
+# solo para encolar y usa su propio AudioProcessor
+_audio_processor: Optional[AudioProcessor] = None
+
+def _get_processor() -> AudioProcessor:
+    """AudioProcessor del worker"""
+    global _audio_processor
+    if _audio_processor is None:
+        _audio_processor = AudioProcessor()
+    return _audio_processor
+
+def _require_files(*paths: str):
+    """
+    Verificar que el worker ve los archivos que recibe
+    
+    Las tareas reciben rutas locales del proceso web, así que el worker debe
+    compartir su sistema de archivos (mismo contenedor o volumen común).
+    """
+    for path in paths:
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"El worker no encuentra {path}: debe compartir "
+                f"{Config.ABS_CACHE_DIR} con el proceso web"
+            )
+
+@celery.task(name='audio.convert')
+def convert_audio_task(input_file: str, **kwargs) -> Optional[str]:
+    """Convertir archivo de audio (ver AudioProcessor.convert_audio)"""
+    _require_files(input_file)
+    return _get_processor().convert_audio(input_file, **kwargs)
+
+@celery.task(name='audio.normalize')
+def normalize_audio_task(input_file: str, target_lufs: float = -14.0) -> Optional[str]:
+    """Normalizar audio (ver AudioProcessor.normalize_audio)"""
+    _require_files(input_file)
+    return _get_processor().normalize_audio(input_file, target_lufs)
+
+@celery.task(name='audio.merge')
+def merge_audio_task(file_list: List[str], output_format: str = 'mp3') -> Optional[str]:
+    """Combinar archivos de audio (ver AudioProcessor.merge_audio_files)"""
+    _require_files(*file_list)
+    return _get_processor().merge_audio_files(file_list, output_format)
+
+@celery.task(name='audio.pipeline')
+def process_pipeline_task(input_file: str, ops: List[Dict[str, Any]]) -> Optional[str]:
+    """Aplicar varias operaciones en una pasada (ver AudioProcessor.process_pipeline)"""
+    _require_files(input_file)
+    return _get_processor().process_pipeline(input_file, ops)
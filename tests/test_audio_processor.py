@@ -0,0 +1,58 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from audio_processor import AudioProcessor
+
+processor = AudioProcessor()
+
+@unittest.skipUnless(processor.is_ffmpeg_available(), 'FFmpeg no disponible')
+class MergeAudioFilesTest(unittest.TestCase):
+    """Combinar archivos reales con el demuxer concat"""
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.outputs = []
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        for path in self.outputs:
+            if path and os.path.exists(path):
+                os.unlink(path)
+    
+    def _make_tone(self, name: str, seconds: int) -> str:
+        """Generar un tono mp3 de la duración indicada"""
+        path = os.path.join(self.tmp_dir, name)
+        subprocess.run(
+            [
+                processor.ffmpeg_path, '-hide_banner', '-loglevel', 'error',
+                '-f', 'lavfi', '-i', f'sine=frequency=440:duration={seconds}',
+                '-ac', '2', '-ar', '44100', '-b:a', '128k', '-y', path
+            ],
+            check=True
+        )
+        return path
+    
+    def test_merge_two_files(self):
+        # Una comilla simple en el nombre también debe llegar escapada al manifest
+        first = self._make_tone('primera.mp3', 1)
+        second = self._make_tone("it's.mp3", 2)
+        
+        output = processor.merge_audio_files([first, second])
+        self.outputs.append(output)
+        
+        self.assertIsNotNone(output)
+        self.assertTrue(os.path.getsize(output) > 0)
+        
+        if processor.ffprobe_path:
+            info = processor.get_audio_info(output)
+            self.assertAlmostEqual(info['duration'], 3, delta=0.5)
+    
+    def test_merge_requires_two_files(self):
+        first = self._make_tone('sola.mp3', 1)
+        self.assertIsNone(processor.merge_audio_files([first]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,7 @@
 from app import app
 
+# Punto de entrada WSGI (gunicorn wsgi:application)
+application = app
+
 if __name__ == "__main__":
     app.run()
@@ -1,48 +1,174 @@
 import os
-import json
+import queue
+import atexit
+import heapq
 import hashlib
 import logging
-from typing import Dict, Any, Optional, Tuple
+import threading
+import time
+from functools import lru_cache
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+import orjson
 import yt_dlp
-from urllib.parse import urlparse, parse_qs
 from datetime import datetime
-import requests
 
 from config import Config
+from cache_index import CacheIndex
 
 logger = logging.getLogger(__name__)
 
+# Dominio -> plataforma (también se aplica a sus subdominios)
+_HOST_PLATFORMS = {
+    'youtube.com': 'youtube',
+    'youtu.be': 'youtube',
+    'vimeo.com': 'vimeo',
+    'facebook.com': 'facebook',
+    'fb.watch': 'facebook',
+    'soundcloud.com': 'soundcloud',
+    'spotify.com': 'spotify',
+    'twitch.tv': 'twitch'
+}
+
+_last_timestamp = (0, '')
+
+def now_iso() -> str:
+    """Fecha actual en ISO 8601, formateada como máximo una vez por segundo"""
+    global _last_timestamp
+    now = int(time.time())
+    cached = _last_timestamp
+    if cached[0] != now:
+        # Se reemplaza la tupla completa: los hilos nunca ven un par a medias
+        cached = _last_timestamp = (now, datetime.fromtimestamp(now).isoformat())
+    return cached[1]
+
+@lru_cache(maxsize=1024)
+def _url_key(url: str) -> str:
+    """Clave de caché de una URL (info y archivo descargado)"""
+    return hashlib.blake2b(url.encode(), digest_size=16).hexdigest()
+
+@lru_cache(maxsize=1024)
+def _platform_from_url(url: str) -> str:
+    """Plataforma de la URL según su hostname (las mismas URLs se repiten mucho)"""
+    # Hostname a mano (esquema://[usuario@]host[:puerto]/...), sin urlparse
+    netloc = url.partition('://')[2]
+    for sep in '/?#':
+        netloc = netloc.partition(sep)[0]
+    hostname = netloc.rpartition('@')[2].partition(':')[0].lower()
+    
+    # Probar el hostname y sus dominios padre: m.youtube.com -> youtube.com
+    while hostname:
+        platform = _HOST_PLATFORMS.get(hostname)
+        if platform:
+            return platform
+        hostname = hostname.partition('.')[2]
+    return 'other'
+
 class AudioExtractor:
     """Clase para extraer audio de diferentes plataformas"""
     
-    def __init__(self):
+    def __init__(self, cache_index: Optional[CacheIndex] = None):
         self.ydl_opts = Config.YTDL_OPTIONS.copy()
+        # Para extraer info, las playlists solo se enumeran; cada entrada se
+        # resuelve después en paralelo (ver _process_playlist)
+        self.info_opts = dict(self.ydl_opts, extract_flat='in_playlist')
+        # Una instancia de YoutubeDL por hilo (no es thread-safe), reutilizada
+        # entre llamadas para conservar conexiones y cookies
+        self._local = threading.local()
+        # Trabajos en curso (info o descarga): las llamadas simultáneas
+        # con la misma clave esperan el resultado de la primera
+        self._inflight: Dict[Tuple, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self._playlist_executor = ThreadPoolExecutor(
+            max_workers=Config.PLAYLIST_CONCURRENCY,
+            thread_name_prefix='playlist'
+        )
         self.cache_dir = Config.ABS_CACHE_DIR
-        self.metadata_cache = {}
+        self.cache_index = cache_index or CacheIndex()
+        # Directorio de caché por plataforma, creado la primera vez que se usa
+        self._platform_dirs: Dict[str, str] = {}
+        
+        # Caché de información: en memoria (clave -> (expira, info)) y en disco
+        self.metadata_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._metadata_lock = threading.Lock()
+        self.info_dir = os.path.join(self.cache_dir, 'info')
+        os.makedirs(self.info_dir, exist_ok=True)
+        
+        # Metadatos de descargas: se escriben en segundo plano; mientras tanto
+        # _load_metadata los lee de _pending_metadata (ruta -> metadatos)
+        self._metadata_queue: 'queue.Queue[Tuple[str, Dict[str, Any]]]' = queue.Queue()
+        self._pending_metadata: Dict[str, Dict[str, Any]] = {}
+        threading.Thread(target=self._metadata_writer, name='metadata-writer', daemon=True).start()
+        atexit.register(self.flush_metadata)
         
     def extract_info(self, url: str) -> Dict[str, Any]:
         """
         Extraer información del video/audio sin descargar
+        
+        Los resultados exitosos se cachean por URL durante INFO_CACHE_TTL,
+        en memoria y en disco (sobreviven a reinicios). Las peticiones
+        simultáneas de la misma URL comparten una sola extracción.
         """
+        if not url or not url.strip():
+            return {'error': 'URL vacía', 'status': 'error', 'url': url}
+        
+        key = _url_key(url)
+        info = self._get_cached_info(key)
+        if info is not None:
+            return info
+        
+        return self._single_flight(('info', key), self._extract_and_store, url, key)
+    
+    def _extract_and_store(self, url: str, key: str) -> Dict[str, Any]:
+        """Extraer información y cachearla si la extracción fue exitosa"""
+        info = self._extract_info(url)
+        if 'error' not in info:
+            self._store_info(key, info)
+        return info
+    
+    def _single_flight(self, key: Tuple, func, *args):
+        """Ejecutar func(*args) una sola vez por clave entre llamadas simultáneas"""
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        
+        if not owner:
+            return future.result()
+        
         try:
-            with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
-                
-                # yt-dlp devuelve None si falla y ignoreerrors=True
-                if info is None:
-                    return {
-                        'error': 'No se pudo obtener información del video (posiblemente no disponible o restringido)',
-                        'status': 'error',
-                        'url': url
-                    }
+            result = func(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+    
+    def _extract_info(self, url: str) -> Dict[str, Any]:
+        """Extraer información con yt-dlp (sin caché)"""
+        try:
+            info = self._info_ydl().extract_info(url, download=False)
+            
+            # yt-dlp devuelve None si falla y ignoreerrors=True
+            if info is None:
+                return {
+                    'error': 'No se pudo obtener información del video (posiblemente no disponible o restringido)',
+                    'status': 'error',
+                    'url': url
+                }
 
-                if 'entries' in info:
-                    # Es una playlist
-                    return self._process_playlist(info)
-                else:
-                    # Es un solo video
-                    return self._process_single(info, url)
-                    
+            if 'entries' in info:
+                # Es una playlist
+                return self._process_playlist(info)
+            else:
+                # Es un solo video
+                return self._process_single(info, url)
+                
         except Exception as e:
             logger.error(f"Error extrayendo info de {url}: {e}")
             return {
@@ -51,9 +177,67 @@ class AudioExtractor:
                 'url': url
             }
     
+    def _info_ydl(self) -> yt_dlp.YoutubeDL:
+        """Instancia de YoutubeDL para extraer info en el hilo actual"""
+        ydl = getattr(self._local, 'ydl', None)
+        if ydl is None:
+            ydl = self._local.ydl = yt_dlp.YoutubeDL(self.info_opts)
+        return ydl
+    
+    def _get_cached_info(self, key: str) -> Optional[Dict[str, Any]]:
+        """Buscar información vigente en memoria y, si no está, en disco"""
+        now = time.time()
+        with self._metadata_lock:
+            cached = self.metadata_cache.get(key)
+            if cached:
+                if cached[0] > now:
+                    return cached[1]
+                del self.metadata_cache[key]
+        
+        info_file = os.path.join(self.info_dir, key + '.json')
+        try:
+            expires = os.stat(info_file).st_mtime + Config.INFO_CACHE_TTL
+            if expires <= now:
+                # Vencida: borrarla para que el directorio no crezca sin límite
+                os.remove(info_file)
+                return None
+            with open(info_file, 'rb') as f:
+                info = orjson.loads(f.read())
+        except (OSError, ValueError):
+            return None
+        
+        self._remember_info(key, expires, info)
+        return info
+    
+    def _store_info(self, key: str, info: Dict[str, Any]):
+        """Guardar información en memoria y en disco (escritura atómica)"""
+        self._remember_info(key, time.time() + Config.INFO_CACHE_TTL, info)
+        
+        info_file = os.path.join(self.info_dir, key + '.json')
+        temp_file = f"{info_file}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_file, 'wb') as f:
+                f.write(orjson.dumps(info))
+            os.replace(temp_file, info_file)
+        except OSError as e:
+            logger.error(f"Error guardando info en caché: {e}")
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
+    
+    def _remember_info(self, key: str, expires: float, info: Dict[str, Any]):
+        """Guardar en la caché de memoria, descartando la entrada más antigua si está llena"""
+        with self._metadata_lock:
+            self.metadata_cache.pop(key, None)
+            self.metadata_cache[key] = (expires, info)
+            if len(self.metadata_cache) > Config.INFO_CACHE_SIZE:
+                del self.metadata_cache[next(iter(self.metadata_cache))]
+    
     def _process_single(self, info: Dict, url: str) -> Dict[str, Any]:
         """Procesar un solo video"""
         platform = self._detect_platform(url)
+        formats = self._summarize_formats(info)
         
         return {
             'id': info.get('id'),
@@ -64,20 +248,27 @@ class AudioExtractor:
             'thumbnail': info.get('thumbnail'),
             'platform': platform,
             'webpage_url': info.get('webpage_url'),
-            'formats': self._extract_audio_formats(info),
+            'formats': formats,
             'status': 'available',
-            'extracted_at': datetime.now().isoformat()
+            'extracted_at': now_iso()
         }
     
     def _process_playlist(self, info: Dict) -> Dict[str, Any]:
-        """Procesar una playlist"""
-        entries = info.get('entries', [])
-        playlist_info = []
+        """Procesar una playlist, extrayendo sus entradas en paralelo"""
+        urls = [
+            entry.get('webpage_url') or entry.get('url')
+            for entry in info.get('entries') or []
+            if entry
+        ]
+        urls = [url for url in urls if url]
         
-        for entry in entries:
-            if entry:
-                track_info = self._process_single(entry, entry.get('webpage_url', ''))
-                playlist_info.append(track_info)
+        if getattr(self._local, 'in_playlist', False):
+            # Playlist anidada: resolver en este hilo para no bloquear el pool
+            results = map(self.extract_info, urls)
+        else:
+            # Pool persistente: cada hilo conserva su instancia de YoutubeDL
+            results = self._playlist_executor.map(self._extract_entry, urls)
+        playlist_info = [track_info for track_info in results if 'error' not in track_info]
         
         return {
             'type': 'playlist',
@@ -87,25 +278,37 @@ class AudioExtractor:
             'status': 'available'
         }
     
+    def _extract_entry(self, url: str) -> Dict[str, Any]:
+        """Extraer una entrada de playlist desde el pool"""
+        self._local.in_playlist = True
+        return self.extract_info(url)
+    
     def download_audio(self, url: str, quality: str = None) -> Tuple[Optional[str], Dict[str, Any]]:
         """
         Descargar audio de la URL
         
+        Las descargas simultáneas de la misma URL y calidad comparten una sola.
+        
         Returns:
             Tuple (filepath, metadata)
         """
+        return self._single_flight(('download', url, quality), self._download_audio, url, quality)
+    
+    def _download_audio(self, url: str, quality: str = None) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Descargar audio con yt-dlp (sin agrupar llamadas)"""
+        # Opciones propias de esta descarga (sin modificar las compartidas)
+        opts = self.ydl_opts.copy()
         if quality and quality != Config.DEFAULT_QUALITY:
-            opts = self.ydl_opts.copy()
-            opts['postprocessors'][0]['preferredquality'] = quality
-        else:
-            opts = self.ydl_opts
+            opts['postprocessors'] = [
+                dict(pp, preferredquality=quality) for pp in opts['postprocessors']
+            ]
         
         try:
             # Generar nombre de archivo único
-            url_hash = hashlib.md5(url.encode()).hexdigest()
+            url_hash = _url_key(url)
             platform = self._detect_platform(url)
             filename = f"{platform}_{url_hash}.mp3"
-            filepath = os.path.join(self.cache_dir, platform, filename)
+            filepath = os.path.join(self._platform_dir(platform), filename)
             
             # Verificar si ya existe en caché
             if os.path.exists(filepath):
@@ -114,76 +317,95 @@ class AudioExtractor:
                     return filepath, metadata
             
             # Modificar opciones para usar ruta específica
+            # (plantilla y postprocesadores se fijan al crear YoutubeDL, así que
+            # cada descarga usa su propia instancia)
             opts['outtmpl'] = os.path.splitext(filepath)[0]
             
             with yt_dlp.YoutubeDL(opts) as ydl:
                 info = ydl.extract_info(url, download=True)
                 
-                # Buscar el archivo descargado
-                downloaded_file = filepath
-                if not os.path.exists(downloaded_file):
-                    # yt-dlp puede usar extensión diferente
-                    for ext in ['.mp3', '.m4a', '.webm', '.opus']:
-                        alt_file = downloaded_file.replace('.mp3', ext)
-                        if os.path.exists(alt_file):
-                            downloaded_file = alt_file
-                            break
+                # yt-dlp devuelve None si falla y ignoreerrors=True
+                if info is None:
+                    return None, {'error': 'No se pudo descargar el audio', 'status': 'error'}
+                
+                # Ruta final que informa yt-dlp (ya con la extensión del postprocesador)
+                requested = info.get('requested_downloads') or [{}]
+                downloaded_file = requested[0].get('filepath') or filepath
                 
                 # Crear metadatos
-                metadata = self._create_metadata(info, url, downloaded_file)
+                metadata = self._create_metadata(info, url, downloaded_file, platform)
                 
                 # Guardar metadatos
                 self._save_metadata(downloaded_file, metadata)
                 
+                # Registrar en el índice del caché
+                if metadata['filesize']:
+                    self.cache_index.add(platform, downloaded_file, metadata['filesize'])
+                
                 return downloaded_file, metadata
                 
         except Exception as e:
             logger.error(f"Error descargando audio de {url}: {e}")
             return None, {'error': str(e), 'status': 'error'}
     
+    def _platform_dir(self, platform: str) -> str:
+        """Directorio de caché de la plataforma (se crea si no existe)"""
+        platform_dir = self._platform_dirs.get(platform)
+        if platform_dir is None:
+            platform_dir = os.path.join(self.cache_dir, platform)
+            os.makedirs(platform_dir, exist_ok=True)
+            self._platform_dirs[platform] = platform_dir
+        return platform_dir
+    
     def _detect_platform(self, url: str) -> str:
         """Detectar la plataforma de la URL"""
-        parsed = urlparse(url)
-        hostname = parsed.hostname.lower() if parsed.hostname else ''
-        
-        if 'youtube.com' in hostname or 'youtu.be' in hostname:
-            return 'youtube'
-        elif 'vimeo.com' in hostname:
-            return 'vimeo'
-        elif 'facebook.com' in hostname or 'fb.watch' in hostname:
-            return 'facebook'
-        elif 'soundcloud.com' in hostname:
-            return 'soundcloud'
-        elif 'spotify.com' in hostname:
-            return 'spotify'
-        elif 'twitch.tv' in hostname:
-            return 'twitch'
-        else:
+        # Sin esquema no hay hostname: evitar urlparse y no ocupar la caché
+        if not url or '://' not in url[:12]:
             return 'other'
+        return _platform_from_url(url)
     
-    def _extract_audio_formats(self, info: Dict) -> list:
-        """Extraer información de formatos de audio disponibles"""
-        formats = []
+    def _summarize_formats(self, info: Dict) -> list:
+        """Extraer los formatos de audio disponibles de mayor calidad"""
+        candidates = (
+            fmt for fmt in info.get('formats') or ()
+            if fmt.get('acodec') != 'none' and fmt.get('vcodec') == 'none'
+        )
+        
+        # Solo los MAX_FORMATS de mayor calidad (bitrate), sin ordenar la lista completa
+        top = heapq.nlargest(Config.MAX_FORMATS, candidates, key=lambda fmt: fmt.get('abr') or 0)
         
-        if 'formats' in info:
-            for fmt in info['formats']:
-                if fmt.get('acodec') != 'none' and fmt.get('vcodec') == 'none':
-                    formats.append({
-                        'format_id': fmt.get('format_id'),
-                        'ext': fmt.get('ext'),
-                        'abr': fmt.get('abr', 0),  # audio bitrate
-                        'asr': fmt.get('asr', 0),  # audio sample rate
-                        'filesize': fmt.get('filesize'),
-                        'format_note': fmt.get('format_note', '')
-                    })
+        formats = [{
+            'format_id': fmt.get('format_id'),
+            'ext': fmt.get('ext'),
+            'abr': fmt.get('abr', 0),  # audio bitrate
+            'asr': fmt.get('asr', 0),  # audio sample rate
+            'filesize': fmt.get('filesize'),
+            'format_note': fmt.get('format_note', '')
+        } for fmt in top]
         
-        # Ordenar por calidad (bitrate)
-        formats.sort(key=lambda x: x.get('abr', 0), reverse=True)
         return formats
     
-    def _create_metadata(self, info: Dict, url: str, filepath: str) -> Dict[str, Any]:
+    def _extract_bitrate(self, info: Dict) -> int:
+        """Bitrate del primer formato que lo indique (se detiene al encontrarlo)"""
+        for fmt in info.get('formats') or ():
+            if fmt.get('abr'):
+                return fmt['abr']
+        return 192  # Valor por defecto
+    
+    def _create_metadata(
+        self,
+        info: Dict,
+        url: str,
+        filepath: str,
+        platform: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Crear metadatos para el archivo de audio"""
-        platform = self._detect_platform(url)
+        platform = platform or self._detect_platform(url)
+        
+        try:
+            filesize = os.stat(filepath).st_size
+        except OSError:
+            filesize = 0
         
         metadata = {
             'id': info.get('id'),
@@ -197,48 +419,70 @@ class AudioExtractor:
             'webpage_url': info.get('webpage_url', url),
             'filepath': filepath,
             'filename': os.path.basename(filepath),
-            'filesize': os.path.getsize(filepath) if os.path.exists(filepath) else 0,
-            'download_date': datetime.now().isoformat(),
+            'filesize': filesize,
+            'download_date': now_iso(),
             'bitrate': self._extract_bitrate(info),
             'status': 'downloaded'
         }
         
         return metadata
     
-    def _extract_bitrate(self, info: Dict) -> int:
-        """Extraer bitrate de la información"""
-        if 'formats' in info:
-            for fmt in info['formats']:
-                if fmt.get('abr'):
-                    return fmt['abr']
-        return 192  # Valor por defecto
-    
     def _save_metadata(self, filepath: str, metadata: Dict[str, Any]):
-        """Guardar metadatos en archivo JSON"""
+        """Encolar el guardado de metadatos (no bloquea la descarga)"""
         metadata_file = filepath + '.meta.json'
+        with self._metadata_lock:
+            self._pending_metadata[metadata_file] = metadata
+        self._metadata_queue.put((metadata_file, metadata))
+    
+    def flush_metadata(self):
+        """Esperar a que se escriban todos los metadatos encolados"""
+        self._metadata_queue.join()
+    
+    def _metadata_writer(self):
+        """Hilo que escribe los metadatos encolados"""
+        while True:
+            metadata_file, metadata = self._metadata_queue.get()
+            try:
+                self._write_metadata(metadata_file, metadata)
+            finally:
+                with self._metadata_lock:
+                    # Solo si no se encoló una versión más nueva entretanto
+                    if self._pending_metadata.get(metadata_file) is metadata:
+                        del self._pending_metadata[metadata_file]
+                self._metadata_queue.task_done()
+    
+    def _write_metadata(self, metadata_file: str, metadata: Dict[str, Any]):
+        """Guardar metadatos en archivo JSON con escritura atómica"""
+        temp_file = metadata_file + '.tmp'
         try:
-            with open(metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, indent=2, ensure_ascii=False)
+            data = orjson.dumps(metadata, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            with open(temp_file, 'wb') as f:
+                f.write(data)
+            os.replace(temp_file, metadata_file)
         except Exception as e:
             logger.error(f"Error guardando metadatos: {e}")
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
     
     def _load_metadata(self, filepath: str) -> Optional[Dict[str, Any]]:
-        """Cargar metadatos desde archivo"""
+        """Cargar metadatos desde archivo (o desde los pendientes de escribir)"""
         metadata_file = filepath + '.meta.json'
-        if os.path.exists(metadata_file):
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                pass
-        return None
+        with self._metadata_lock:
+            metadata = self._pending_metadata.get(metadata_file)
+        if metadata is not None:
+            return metadata
+        
+        try:
+            with open(metadata_file, 'rb') as f:
+                return orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError):
+            return None
     
     def clear_cache(self, platform: str = None, days_old: int = 7):
         """Limpiar caché de archivos antiguos"""
-        from datetime import datetime, timedelta
-        import time
-        
-        cutoff_time = datetime.now() - timedelta(days=days_old)
+        cutoff_ts = time.time() - days_old * 86400
         
         if platform:
             cache_dirs = [os.path.join(self.cache_dir, platform)]
@@ -246,18 +490,54 @@ class AudioExtractor:
             cache_dirs = [os.path.join(self.cache_dir, p) for p in Config.ALLOWED_PLATFORMS]
             cache_dirs.append(self.cache_dir)
         
-        deleted_files = 0
-        for cache_dir in cache_dirs:
-            if os.path.exists(cache_dir):
-                for filename in os.listdir(cache_dir):
-                    filepath = os.path.join(cache_dir, filename)
-                    try:
-                        # Verificar antigüedad
-                        mtime = datetime.fromtimestamp(os.path.getmtime(filepath))
-                        if mtime < cutoff_time:
-                            os.remove(filepath)
-                            deleted_files += 1
-                    except:
-                        continue
+        # Un directorio por hilo: el borrado es I/O y se solapa bien
+        with ThreadPoolExecutor(max_workers=min(8, len(cache_dirs) + 1)) as executor:
+            # Información extraída: también se borra la que ya venció
+            info_future = None
+            if not platform:
+                info_cutoff = max(cutoff_ts, time.time() - Config.INFO_CACHE_TTL)
+                info_future = executor.submit(self._prune_dir, self.info_dir, info_cutoff)
+            
+            results = executor.map(lambda d: self._prune_dir(d, cutoff_ts), cache_dirs)
+            deleted_paths = [path for paths in results for path in paths]
+            deleted_info = info_future.result() if info_future else []
+        
+        # El índice solo registra audio
+        self.cache_index.remove(*deleted_paths)
+        return len(deleted_paths) + len(deleted_info)
+    
+    def _prune_dir(self, cache_dir: str, cutoff_ts: float) -> List[str]:
+        """
+        Borrar los archivos de cache_dir modificados antes de cutoff_ts
+        
+        Los metadatos (.meta.json) se borran junto con su audio; solo se
+        borran por separado si su audio ya no existe.
+        """
+        try:
+            with os.scandir(cache_dir) as entries:
+                files = {entry.name: entry for entry in entries if entry.is_file()}
+        except OSError:
+            return []
+        
+        deleted_paths = []
+        for name, entry in files.items():
+            is_sidecar = name.endswith('.meta.json')
+            if is_sidecar and name[:-len('.meta.json')] in files:
+                continue
+            
+            try:
+                # Verificar antigüedad (un solo stat por archivo)
+                if entry.stat().st_mtime >= cutoff_ts:
+                    continue
+                os.remove(entry.path)
+            except OSError:
+                continue
+            
+            if not is_sidecar:
+                deleted_paths.append(entry.path)
+                try:
+                    os.remove(entry.path + '.meta.json')
+                except OSError:
+                    pass
         
-        return deleted_files
\ No newline at end of file
+        return deleted_paths